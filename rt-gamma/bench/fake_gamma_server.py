@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gamma public API, for benchmarks and offline testing.
+
+Implements POST /generations, POST /generations/from-template,
+GET /generations/{id} and GET /themes with configurable generation
+latency, failure rate and 429 behavior. Point rt-gamma at it with
+`api_base_url = "http://127.0.0.1:<port>"` in .claude/rt-gamma.toml.
+
+Usage: python fake_gamma_server.py [--port 8787] [--latency 5] [--jitter 0.3]
+                                   [--failure-rate 0] [--rate-limit 0]
+
+GET /_stats returns request counts and per-generation timings;
+POST /_reset clears them.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+THEMES = [
+    {"id": "oasis", "name": "Oasis"},
+    {"id": "night-sky", "name": "Night Sky"},
+    {"id": "chisel", "name": "Chisel"},
+    {"id": "gamma-default", "name": "Default Light"},
+]
+
+THEMES_ETAG = '"themes-v1"'
+
+STATUS_PATH = re.compile(r"^/generations/([\w-]+)$")
+
+
+class FakeGamma:
+    """Shared state and behavior knobs for the fake server."""
+
+    def __init__(
+        self,
+        latency: float = 5.0,
+        jitter: float = 0.3,
+        failure_rate: float = 0.0,
+        rate_limit: float = 0.0,
+        retry_after: float = 1.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.generations = {}
+            self.counts = {"create": 0, "status": 0, "themes": 0, "rate_limited": 0, "bytes_in": 0}
+            self._tokens = max(1.0, self.rate_limit)
+            self._updated = time.monotonic()
+
+    def allow(self) -> bool:
+        """Server-side token bucket; False means answer 429."""
+        if self.rate_limit <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self._tokens = min(
+                max(1.0, self.rate_limit), self._tokens + (now - self._updated) * self.rate_limit
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.counts["rate_limited"] += 1
+            return False
+
+    def create(self) -> str:
+        generation_id = uuid.uuid4().hex[:12]
+        duration = max(0.0, self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+        with self.lock:
+            self.counts["create"] += 1
+            self.generations[generation_id] = {
+                "submitted": time.time(),
+                "ready_at": time.time() + duration,
+                "fails": random.random() < self.failure_rate,
+                "polls": 0,
+                "observed": None,
+            }
+        return generation_id
+
+    def status(self, generation_id: str):
+        with self.lock:
+            self.counts["status"] += 1
+            gen = self.generations.get(generation_id)
+            if gen is None:
+                return None
+            gen["polls"] += 1
+            if time.time() < gen["ready_at"]:
+                return {"generationId": generation_id, "status": "pending"}
+            if gen["observed"] is None:
+                gen["observed"] = time.time()
+            if gen["fails"]:
+                return {"generationId": generation_id, "status": "failed", "error": "Simulated failure"}
+            return {
+                "generationId": generation_id,
+                "status": "completed",
+                "gammaUrl": f"https://gamma.app/docs/fake-{generation_id}",
+            }
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "counts": dict(self.counts),
+                "generations": [
+                    {
+                        "id": gid,
+                        "submitted": g["submitted"],
+                        "ready_at": g["ready_at"],
+                        "observed": g["observed"],
+                        "polls": g["polls"],
+                        "failed": g["fails"],
+                    }
+                    for gid, g in self.generations.items()
+                ],
+            }
+
+
+def make_handler(fake: FakeGamma):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, code: int, obj, headers: dict = None) -> None:
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length) if length else b""
+            with fake.lock:
+                fake.counts["bytes_in"] += length
+            return body
+
+        def _guard(self) -> bool:
+            """Check auth and the server rate limit. False if already answered."""
+            if not self.headers.get("X-API-KEY"):
+                self._send(401, {"message": "Missing X-API-KEY"})
+                return False
+            if not fake.allow():
+                self._send(
+                    429, {"message": "Too many requests"},
+                    {"Retry-After": f"{fake.retry_after:g}"},
+                )
+                return False
+            return True
+
+        def do_POST(self):
+            body = self._read_body()
+            if self.path == "/_reset":
+                fake.reset()
+                return self._send(200, {"ok": True})
+            if self.path not in ("/generations", "/generations/from-template"):
+                return self._send(404, {"message": "Not found"})
+            if not self._guard():
+                return
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                return self._send(400, {"message": "Invalid JSON"})
+            required = "inputText" if self.path == "/generations" else "gammaId"
+            if not payload.get(required):
+                return self._send(400, {"message": f"Missing {required}"})
+            self._send(200, {"generationId": fake.create()})
+
+        def do_GET(self):
+            if self.path == "/_stats":
+                return self._send(200, fake.stats())
+            if self.path == "/themes":
+                if not self._guard():
+                    return
+                with fake.lock:
+                    fake.counts["themes"] += 1
+                if self.headers.get("If-None-Match") == THEMES_ETAG:
+                    self.send_response(304)
+                    self.send_header("ETag", THEMES_ETAG)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                return self._send(200, {"data": THEMES}, {"ETag": THEMES_ETAG})
+            match = STATUS_PATH.match(self.path)
+            if not match:
+                return self._send(404, {"message": "Not found"})
+            if not self._guard():
+                return
+            status = fake.status(match.group(1))
+            if status is None:
+                return self._send(404, {"message": "Generation not found"})
+            self._send(200, status)
+
+    return Handler
+
+
+def start_server(fake: FakeGamma, port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake server on a background thread. Port 0 picks a free port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gamma API")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=5.0, help="Mean generation time (s)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Latency spread (fraction)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of failed generations")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests/s before 429 (0 = off)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429 (s)")
+    args = parser.parse_args()
+
+    fake = FakeGamma(args.latency, args.jitter, args.failure_rate, args.rate_limit, args.retry_after)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(fake))
+    print(f"Fake Gamma API listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Measure rt-gamma startup cost and check it against an import-time budget.
+
+For each entry point, imports the module several times in a fresh
+interpreter with `-X importtime` and takes the fastest cumulative time.
+Budgets are relative to the stdlib every entry point needs anyway
+(BASELINE), measured in the same run, so the check holds on slow and
+fast machines alike. Also checks that modules which are only needed for
+network access (requests, aiohttp, ...) are not imported at startup.
+
+Usage: python import_budget.py [--runs 7] [--json]
+
+Exits 1 if any entry point is over budget or imports a deferred module.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+# Stdlib modules every entry point imports; their import time is the unit
+BASELINE = ("pathlib", "re", "typing")
+
+# Cumulative import time budget per module, as a multiple of BASELINE
+BUDGET = {
+    "config": 2.0,
+    "markdown_utils": 2.0,
+    "gamma_client": 2.5,
+    "themes": 3.0,
+    "batch": 4.5,
+    "generate": 4.5,
+}
+
+# Only imported once a request is actually made
+DEFERRED = ("requests", "urllib3", "aiohttp", "async_gamma_client", "daemon", "socketserver")
+
+
+def import_ms(runs: int, *modules: str) -> float:
+    """
+    Fastest cumulative import time of modules together, in milliseconds.
+
+    Read from `python -X importtime`, which times the import inside the
+    interpreter and so excludes process start-up noise.
+    """
+    best = float("inf")
+    for _ in range(runs):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+            cwd=SCRIPTS_DIR, check=True, capture_output=True, text=True,
+        ).stderr
+        total = 0
+        for line in stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() in modules and fields[2][1] != " ":
+                total += int(fields[1])
+        best = min(best, total / 1000)
+    return best
+
+
+def loaded_modules(module: str) -> set:
+    """Names in sys.modules after importing module."""
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=SCRIPTS_DIR, check=True,
+        capture_output=True, text=True,
+    ).stdout
+    return set(json.loads(output))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check rt-gamma import times against a budget")
+    parser.add_argument("--runs", type=int, default=7, help="Runs per measurement (fastest wins)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    baseline = import_ms(args.runs, *BASELINE)
+    rows = []
+    for module, budget in BUDGET.items():
+        elapsed = import_ms(args.runs, module)
+        eager = sorted(m for m in DEFERRED if m in loaded_modules(module))
+        rows.append({
+            "module": module,
+            "import_ms": round(elapsed, 1),
+            "ratio": round(elapsed / baseline, 2),
+            "budget": budget,
+            "ok": elapsed <= budget * baseline and not eager,
+            "eager": ", ".join(eager) or "-",
+        })
+
+    if args.json:
+        print(json.dumps({"baseline_ms": round(baseline, 1), "modules": rows}, indent=2))
+    else:
+        print(f"baseline ({', '.join(BASELINE)}): {baseline:.1f} ms")
+        print(f"{'module':<16}{'import_ms':>10}{'ratio':>8}{'budget':>8}  {'ok':<4}eager")
+        for row in rows:
+            print(
+                f"{row['module']:<16}{row['import_ms']:>10}{row['ratio']:>8}{row['budget']:>8}  "
+                f"{'yes' if row['ok'] else 'NO':<4}{row['eager']}"
+            )
+    sys.exit(0 if all(row["ok"] for row in rows) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark rt-gamma against the local fake Gamma server.
+
+Runs generate.py and batch.py as subprocesses, exactly as the slash
+command does, inside a throwaway project whose config points at the
+fake server. Reports decks per minute, p50/p95 per-file end-to-end
+latency (from each result's timing) and request counts for each scenario.
+
+Usage: python run_bench.py [--decks 20] [--concurrency 1 4 8] [--single-runs 5]
+                           [--latency 3] [--failure-rate 0] [--rate-limit 0]
+                           [--async] [--json]
+"""
+import argparse
+import json
+import math
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fake_gamma_server import FakeGamma, start_server
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def make_project(root: Path, base_url: str, decks: int, args) -> Path:
+    """Create a project with config and `decks` markdown files. Returns the deck folder."""
+    claude_dir = root / ".claude"
+    claude_dir.mkdir()
+    (claude_dir / "rt-gamma.toml").write_text(
+        f'api_key = "bench"\n'
+        f'api_base_url = "{base_url}"\n'
+        f'rate_limit_create = {args.client_create_rate}\n'
+        f'rate_limit_status = {args.client_status_rate}\n',
+        encoding="utf-8",
+    )
+    deck_dir = root / "decks"
+    deck_dir.mkdir()
+    for i in range(decks):
+        (deck_dir / f"deck{i:04d}_presentation.md").write_text(
+            f"# Benchmark deck {i}\n\nRun {time.time()}\n\n---\n\n# Second card\n\nBody\n",
+            encoding="utf-8",
+        )
+    return deck_dir
+
+
+def run_script(cwd: Path, *argv: str) -> dict:
+    """Run an rt-gamma script and parse its JSON output."""
+    proc = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / argv[0]), *argv[1:]],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    try:
+        return json.loads(proc.stdout)
+    except ValueError:
+        return {"success": False, "error": proc.stderr.strip() or proc.stdout.strip()}
+
+
+def summarize(name: str, fake: FakeGamma, wall: float, results: list[dict], total: int) -> dict:
+    """
+    One table row. Latency is each successful file's own end-to-end
+    time (timing.total_s from the script output: read, submit, polling
+    and writing the redirect), not the server's submit-to-completion time.
+    """
+    counts = fake.stats()["counts"]
+    succeeded = [r for r in results if r.get("success")]
+    latencies = [r["timing"]["total_s"] for r in succeeded if "timing" in r]
+    return {
+        "scenario": name,
+        "decks": total,
+        "succeeded": len(succeeded),
+        "wall_s": round(wall, 2),
+        "decks_per_min": round(len(succeeded) / wall * 60, 1) if wall else 0.0,
+        "p50_latency_s": round(percentile(latencies, 50), 2),
+        "p95_latency_s": round(percentile(latencies, 95), 2),
+        "create_requests": counts["create"],
+        "status_requests": counts["status"],
+        "status_per_deck": round(counts["status"] / total, 1) if total else 0.0,
+        "rate_limited": counts["rate_limited"],
+    }
+
+
+def bench_generate(fake: FakeGamma, base_url: str, args) -> dict:
+    """Sequential generate.py runs, one process per deck."""
+    fake.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        deck_dir = make_project(root, base_url, args.single_runs, args)
+        start = time.monotonic()
+        results = [
+            run_script(root, "generate.py", str(path), "--no-cache")
+            for path in sorted(deck_dir.glob("*.md"))
+        ]
+        wall = time.monotonic() - start
+    return summarize("generate.py x%d" % args.single_runs, fake, wall, results, len(results))
+
+
+def bench_batch(fake: FakeGamma, base_url: str, args, concurrency: int, use_async: bool) -> dict:
+    """One batch.py run over all decks."""
+    fake.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        deck_dir = make_project(root, base_url, args.decks, args)
+        argv = ["batch.py", str(deck_dir), "--concurrency", str(concurrency), "--no-cache"]
+        if use_async:
+            argv.append("--async")
+        start = time.monotonic()
+        result = run_script(root, *argv)
+        wall = time.monotonic() - start
+    name = f"batch.py {'--async ' if use_async else ''}-c {concurrency}"
+    return summarize(name, fake, wall, result.get("results", []), args.decks)
+
+
+def print_table(rows: list[dict]) -> None:
+    columns = list(rows[0].keys())
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rt-gamma against a fake Gamma API")
+    parser.add_argument("--decks", type=int, default=20, help="Decks per batch scenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--single-runs", type=int, default=5, help="generate.py runs (0 to skip)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Also run batch.py --async at the highest concurrency")
+    parser.add_argument("--latency", type=float, default=3.0, help="Mean generation time (s)")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Server requests/s before 429")
+    parser.add_argument("--client-create-rate", type=float, default=0,
+                        help="rate_limit_create written to the bench config (0 = off)")
+    parser.add_argument("--client-status-rate", type=float, default=0,
+                        help="rate_limit_status written to the bench config (0 = off)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    fake = FakeGamma(args.latency, args.jitter, args.failure_rate, args.rate_limit)
+    server = start_server(fake)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    rows = []
+    if args.single_runs:
+        rows.append(bench_generate(fake, base_url, args))
+    for concurrency in args.concurrency:
+        rows.append(bench_batch(fake, base_url, args, concurrency, use_async=False))
+    if args.use_async:
+        rows.append(bench_batch(fake, base_url, args, max(args.concurrency), use_async=True))
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
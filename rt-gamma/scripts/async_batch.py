@@ -0,0 +1,300 @@
+"""asyncio batch driver: many generations in flight from one thread.
+
+Used by `batch.py --async`. Each file is a coroutine rather than a
+thread, so hundreds of generations can wait on Gamma at once with a
+small footprint. Decks go through the same steps as in the threaded
+driver (batch.deck_steps), so caching, manifest resume and redirect
+output behave exactly the same. Everything that touches the disk runs
+in a worker thread, keeping the event loop free for the network.
+"""
+import asyncio
+import time
+from pathlib import Path
+from typing import Callable, Generator, Iterable, Optional
+
+from async_gamma_client import AsyncGammaAPIClient
+from batch import deck_steps, finish_file, plan_file
+from cache import ResultCache, content_key
+from config import get_timings_path
+from gamma_client import PollStrategy
+from manifest import BatchManifest
+from poller import WAIT_GRACE, StatusPoller
+from telemetry import FileTrace, span, tracing
+
+
+class AsyncStatusPoller(StatusPoller):
+    """
+    asyncio counterpart of StatusPoller.
+
+    One task polls every outstanding generation on the same shared tick
+    and PollStrategy schedule, checking at most `max_per_tick` due
+    generations per tick. Create and use it from inside the event loop.
+    """
+
+    def __init__(
+        self,
+        client: AsyncGammaAPIClient,
+        strategy: Optional[PollStrategy] = None,
+        interval: float = 0.5,
+        max_per_tick: int = 2,
+        timeout: float = 120.0,
+    ):
+        super().__init__(client, strategy, interval, max_per_tick, timeout)
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    async def wait(
+        self,
+        generation_id: str,
+        on_status: Optional[Callable[[str], None]] = None,
+    ) -> dict:
+        """
+        Track a generation until it finishes, giving up WAIT_GRACE
+        seconds after its deadline.
+
+        Returns the final status dict, or a dict with status 'failed'
+        and an error message.
+        """
+        if self._closed:
+            raise RuntimeError("StatusPoller is closed")
+        done = asyncio.get_running_loop().create_future()
+
+        def on_complete(status: dict) -> None:
+            if not done.done():
+                done.set_result(status)
+
+        def on_failure(error: str) -> None:
+            if not done.done():
+                done.set_result({"status": "failed", "error": error})
+
+        entry = self._new_entry(generation_id, on_complete, on_failure, on_status)
+        self._queue.append(entry)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        try:
+            return await asyncio.wait_for(done, self.timeout + WAIT_GRACE)
+        except asyncio.TimeoutError:
+            self._forget(entry)
+            return {"status": "failed", "error": self._timeout_error()}
+
+    async def close(self) -> None:
+        """Stop the polling task. Outstanding generations are abandoned."""
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        next_tick = time.monotonic()
+        while True:
+            # Wait for the next shared tick and for something to be due;
+            # new work never shortens the wait for the next tick
+            self._wakeup.clear()
+            if not self._queue:
+                await self._wakeup.wait()
+                continue
+            wake = max(next_tick, min(e["due"] for e in self._queue))
+            remaining = wake - time.monotonic()
+            if remaining > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.monotonic()
+            batch = self._take_due(now)
+            next_tick = now + self.interval
+            pending = await asyncio.gather(
+                *(self._poll(entry) for entry in batch), return_exceptions=True
+            )
+            for entry, still_pending in zip(batch, pending):
+                if isinstance(still_pending, Exception):
+                    self._notify(entry, "on_failure", str(still_pending))
+                elif still_pending and not entry.get("forgotten"):
+                    # Rejoin at the back of the round-robin
+                    self._queue.append(entry)
+
+    async def _poll(self, entry: dict) -> bool:
+        """Poll one generation. Returns True if it is still pending."""
+        try:
+            with tracing(entry["trace"]):
+                status, retry_after = await self.client.poll_generation_status(entry["id"])
+        except Exception as e:
+            self._notify(entry, "on_failure", str(e))
+            return False
+        return self._update(entry, status, retry_after)
+
+
+async def generate_single_async(
+    client: AsyncGammaAPIClient,
+    file_path: Path,
+    config: dict,
+    poller: AsyncStatusPoller,
+    cache: Optional[ResultCache] = None,
+    use_cache: bool = True,
+    manifest: Optional[BatchManifest] = None,
+) -> dict:
+    """
+    Generate a single presentation. Async counterpart of batch.generate_single.
+
+    Returns dict with success, url, error, timing, etc.
+    """
+    trace = FileTrace(str(file_path))
+    with tracing(trace):
+        result = await _generate_single_async(
+            client, file_path, config, poller, cache, use_cache, manifest
+        )
+    result["timing"] = trace.to_dict()
+    return result
+
+
+async def _generate_single_async(
+    client: AsyncGammaAPIClient,
+    file_path: Path,
+    config: dict,
+    poller: AsyncStatusPoller,
+    cache: Optional[ResultCache],
+    use_cache: bool,
+    manifest: Optional[BatchManifest],
+) -> dict:
+    try:
+        final_content, decks = await asyncio.to_thread(_plan_file, file_path, config)
+        key = content_key(final_content, config)
+
+        if len(decks) == 1:
+            outcomes = [await _run_deck_steps(
+                client, poller, deck_steps(
+                    str(file_path), final_content, decks[0]["num_cards"], key,
+                    config, cache, use_cache, manifest,
+                ),
+            )]
+        else:
+            # One deck at a time, so a split file holds one concurrency slot
+            outcomes = []
+            for index, deck in enumerate(decks, 1):
+                outcomes.append(await _run_deck_steps(client, poller, deck_steps(
+                    f"{file_path}#part{index}", deck["content"], deck["num_cards"],
+                    content_key(deck["content"], config),
+                    config, cache, use_cache, manifest,
+                )))
+
+        return await asyncio.to_thread(finish_file, file_path, key, outcomes, cache)
+
+    except Exception as e:
+        return {
+            "path": str(file_path),
+            "success": False,
+            "error": str(e)
+        }
+
+
+def _plan_file(file_path: Path, config: dict) -> tuple[str, list[dict]]:
+    with span("read"):
+        return plan_file(file_path, config)
+
+
+async def _run_deck_steps(
+    client: AsyncGammaAPIClient,
+    poller: AsyncStatusPoller,
+    steps: Generator[tuple, dict, dict],
+) -> dict:
+    """
+    Async driver for batch.deck_steps.
+
+    The generator itself (cache lookups, manifest fsyncs) is advanced in
+    a worker thread; its submit and wait steps run on the event loop.
+    """
+    reply = None
+    while True:
+        step = await asyncio.to_thread(_advance, steps, reply)
+        if step[0] == "done":
+            return step[1]
+        if step[0] == "submit":
+            _, method, kwargs = step
+            reply = await getattr(client, method)(**kwargs)
+        else:
+            _, generation_id, on_status = step
+            # Status changes are written to the manifest off the loop;
+            # all of them land before the generation's final record
+            writes = []
+            reply = await poller.wait(
+                generation_id,
+                lambda state: writes.append(
+                    asyncio.ensure_future(asyncio.to_thread(on_status, state))
+                ),
+            )
+            await asyncio.gather(*writes)
+
+
+def _advance(steps: Generator[tuple, dict, dict], reply: Optional[dict]) -> tuple:
+    # StopIteration cannot cross to_thread, so the outcome comes back as a step
+    try:
+        return steps.send(reply)
+    except StopIteration as done:
+        return ("done", done.value)
+
+
+async def _run(
+    files: Iterable[Path],
+    config: dict,
+    concurrency: int,
+    cache: ResultCache,
+    use_cache: bool,
+    manifest: BatchManifest,
+    on_result: Callable[[dict], None],
+) -> list[dict]:
+    slots = asyncio.Semaphore(concurrency)
+
+    async with AsyncGammaAPIClient.from_config(config, pool_size=min(concurrency, 50)) as client:
+        # All in-flight generations share one status poller
+        poller = AsyncStatusPoller(client, PollStrategy(get_timings_path()))
+
+        async def bounded(file_path: Path) -> dict:
+            async with slots:
+                result = await generate_single_async(
+                    client, file_path, config, poller, cache, use_cache, manifest
+                )
+            await asyncio.to_thread(on_result, result)
+            return result
+
+        try:
+            # Pull files from the (blocking) discovery walk on a worker thread
+            # so submissions start while the walk is still running
+            loop = asyncio.get_running_loop()
+            walk = iter(files)
+            tasks = []
+            while True:
+                file_path = await loop.run_in_executor(None, next, walk, None)
+                if file_path is None:
+                    break
+                tasks.append(asyncio.create_task(bounded(file_path)))
+
+            # gather() returns results in discovery order
+            return await asyncio.gather(*tasks)
+        finally:
+            await poller.close()
+
+
+def run_async_batch(
+    files: Iterable[Path],
+    config: dict,
+    concurrency: int,
+    cache: ResultCache,
+    use_cache: bool,
+    manifest: BatchManifest,
+    on_result: Callable[[dict], None],
+) -> list[dict]:
+    """
+    Process files with up to `concurrency` generations in flight on one event loop.
+
+    on_result is called (in a worker thread) with each result as soon as
+    its file finishes.
+    """
+    return asyncio.run(
+        _run(files, config, concurrency, cache, use_cache, manifest, on_result)
+    )
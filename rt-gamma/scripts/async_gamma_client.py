@@ -0,0 +1,399 @@
+"""asyncio-native Gamma API client.
+
+Uses aiohttp when it is installed. Otherwise falls back to a small
+built-in HTTP/1.1 client on asyncio streams, so no third-party package
+is required to keep many generations in flight from one thread.
+"""
+import asyncio
+import json
+import random
+import ssl
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import telemetry
+from gamma_client import (
+    RETRY_STATUS_CREATE,
+    RETRY_STATUS_READ,
+    generation_payload,
+    parse_retry_after,
+    template_payload,
+)
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Errors treated like a dropped connection and retried
+TRANSIENT_ERRORS = (OSError, asyncio.TimeoutError)
+if aiohttp is not None:
+    TRANSIENT_ERRORS += (aiohttp.ClientError,)
+
+
+class ConnectError(ConnectionError):
+    """A connection could not be established; nothing was sent."""
+
+
+def is_connect_error(error: Exception) -> bool:
+    """True if error means the connection failed before anything was sent."""
+    if aiohttp is not None and isinstance(error, aiohttp.ClientConnectorError):
+        return True
+    return isinstance(error, ConnectError)
+
+
+class HTTPStatusError(Exception):
+    """Raised for a non-success HTTP response."""
+
+    def __init__(self, status: int, url: str, body: bytes = b""):
+        super().__init__(f"{status} Error for url: {url}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+
+class Response:
+    """Minimal response: status code, lower-cased headers and body."""
+
+    def __init__(self, url: str, status_code: int, headers: dict, body: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HTTPStatusError(self.status_code, self.url, self.body)
+
+
+class StreamTransport:
+    """
+    HTTP/1.1 over asyncio streams with a keep-alive connection pool.
+
+    Supports exactly what the Gamma API needs: JSON request bodies and
+    responses framed by Content-Length, chunked encoding or close.
+    """
+
+    def __init__(self, headers: dict, pool_size: int = 10):
+        self.headers = headers
+        self._idle = {}
+        self._slots = asyncio.Semaphore(pool_size)
+        self._ssl = ssl.create_default_context()
+
+    async def request(self, method: str, url: str, body: Optional[bytes], timeout: float) -> Response:
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        host = parts.hostname
+        port = parts.port or (443 if secure else 80)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        key = (host, port, secure)
+
+        async with self._slots:
+            # A pooled connection may have been closed by the server;
+            # retry once on a fresh connection if it was
+            for reuse in (True, False):
+                conn = self._take_idle(key) if reuse else None
+                if conn is None:
+                    try:
+                        conn = await asyncio.wait_for(
+                            asyncio.open_connection(
+                                host, port,
+                                ssl=self._ssl if secure else None,
+                                server_hostname=host if secure else None,
+                            ),
+                            timeout,
+                        )
+                    except (OSError, asyncio.TimeoutError) as e:
+                        raise ConnectError(f"Could not connect to {host}: {e}") from e
+                    reuse = False
+                try:
+                    status, headers, payload, keep_alive = await asyncio.wait_for(
+                        self._exchange(conn, method, host, port, target, body), timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn[1].close()
+                    if reuse:
+                        continue
+                    raise
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.setdefault(key, []).append(conn)
+                else:
+                    conn[1].close()
+                return Response(url, status, headers, payload)
+
+    def _take_idle(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if not conn[0].at_eof():
+                return conn
+            conn[1].close()
+        return None
+
+    async def _exchange(self, conn, method, host, port, target, body):
+        reader, writer = conn
+        host_header = host if port in (80, 443) else f"{host}:{port}"
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host_header}"]
+        lines += [f"{name}: {value}" for name, value in self.headers.items()]
+        lines.append(f"Content-Length: {len(body or b'')}")
+        lines.append("Connection: keep-alive")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed before response")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            payload = b"".join(chunks)
+            framed = True
+        elif "content-length" in headers:
+            payload = await reader.readexactly(int(headers["content-length"]))
+            framed = True
+        else:
+            payload = await reader.read()
+            framed = False
+
+        keep_alive = framed and headers.get("connection", "").lower() != "close"
+        return status, headers, payload, keep_alive
+
+    async def close(self) -> None:
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+        self._idle.clear()
+
+
+class AiohttpTransport:
+    """Transport backed by an aiohttp ClientSession."""
+
+    def __init__(self, headers: dict, pool_size: int = 10):
+        self._session = aiohttp.ClientSession(
+            headers=headers,
+            connector=aiohttp.TCPConnector(limit=pool_size),
+        )
+
+    async def request(self, method: str, url: str, body: Optional[bytes], timeout: float) -> Response:
+        async with self._session.request(
+            method, url, data=body, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as r:
+            payload = await r.read()
+            headers = {k.lower(): v for k, v in r.headers.items()}
+            return Response(url, r.status, headers, payload)
+
+    async def close(self) -> None:
+        await self._session.close()
+
+
+class AsyncTokenBucket:
+    """asyncio counterpart of gamma_client.TokenBucket."""
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 10.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until available. Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now >= self._paused_until and self._tokens >= 1:
+                self._tokens -= 1
+                return waited
+            delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AsyncGammaAPIClient:
+    """
+    asyncio client for the Gamma public API.
+
+    Mirrors GammaAPIClient: same methods, rate limits and retry policy,
+    but every method is a coroutine. Use as an async context manager, or
+    call close() when done. Create it from inside a running event loop.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://public-api.gamma.app/v1.0",
+        pool_size: int = 10,
+        create_per_minute: float = 30,
+        status_per_minute: float = 120,
+        max_retries: int = 4,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.create_bucket = AsyncTokenBucket(create_per_minute)
+        self.status_bucket = AsyncTokenBucket(status_per_minute)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        headers = {
+            "X-API-KEY": api_key,
+            "Content-Type": "application/json",
+        }
+        if aiohttp is not None:
+            self.transport = AiohttpTransport(headers, pool_size)
+        else:
+            self.transport = StreamTransport(headers, pool_size)
+
+    @classmethod
+    def from_config(cls, config: dict, **kwargs) -> "AsyncGammaAPIClient":
+        """Create a client using the API key, endpoint and rate limits from config."""
+        if config.get("api_base_url"):
+            kwargs.setdefault("base_url", config["api_base_url"].rstrip("/"))
+        return cls(
+            config["api_key"],
+            create_per_minute=float(config.get("rate_limit_create", 30)),
+            status_per_minute=float(config.get("rate_limit_status", 120)),
+            max_retries=int(config.get("max_retries", 4)),
+            **kwargs,
+        )
+
+    async def __aenter__(self) -> "AsyncGammaAPIClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.transport.close()
+
+    async def list_themes(self) -> list[dict]:
+        """Fetch all available themes in the workspace."""
+        url = f"{self.base_url}/themes"
+        response = await self._request("GET", url, self.status_bucket, RETRY_STATUS_READ)
+        data = response.json()
+        return data.get("data", data) if isinstance(data, dict) else data
+
+    async def generate_presentation(
+        self,
+        input_text: str,
+        text_mode: str = "preserve",
+        format_type: str = "presentation",
+        theme_id: Optional[str] = None,
+        num_cards: int = 10,
+        card_split: str = "inputTextBreaks",
+        image_source: str = "aiGenerated",
+    ) -> dict:
+        """Generate a new presentation. See GammaAPIClient.generate_presentation."""
+        payload = generation_payload(
+            input_text, text_mode, format_type, theme_id, num_cards, card_split, image_source
+        )
+        url = f"{self.base_url}/generations"
+        response = await self._request(
+            "POST", url, self.create_bucket, RETRY_STATUS_CREATE, payload
+        )
+        return response.json()
+
+    async def create_from_template(
+        self,
+        gamma_id: str,
+        prompt: str,
+        theme_id: Optional[str] = None,
+    ) -> dict:
+        """Create a presentation from a template. See GammaAPIClient.create_from_template."""
+        payload = template_payload(gamma_id, prompt, theme_id)
+        url = f"{self.base_url}/generations/from-template"
+        response = await self._request(
+            "POST", url, self.create_bucket, RETRY_STATUS_CREATE, payload
+        )
+        return response.json()
+
+    async def get_generation_status(self, generation_id: str) -> dict:
+        """Check the status of a generation and get URLs if ready."""
+        return (await self.poll_generation_status(generation_id))[0]
+
+    async def poll_generation_status(self, generation_id: str) -> tuple[dict, Optional[float]]:
+        """Check the status of a generation, including the Retry-After hint."""
+        url = f"{self.base_url}/generations/{generation_id}"
+        telemetry.count("status_polls")
+        response = await self._request("GET", url, self.status_bucket, RETRY_STATUS_READ)
+        return response.json(), parse_retry_after(response.headers.get("retry-after"))
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        bucket: AsyncTokenBucket,
+        retry_status: set,
+        payload: Optional[dict] = None,
+    ) -> Response:
+        """
+        Send a rate-limited request, retrying 429/5xx and connection errors.
+
+        As in GammaAPIClient._request, POST is only retried after a
+        connection error that happened before the request was sent.
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        attempt = 0
+        while True:
+            waited = await bucket.acquire()
+            if waited:
+                telemetry.count("rate_limit_wait_s", waited)
+            telemetry.count("requests")
+            telemetry.count("bytes_sent", len(body or b""))
+            try:
+                response = await self.transport.request(method, url, body, self.timeout)
+            except TRANSIENT_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                if method == "POST" and not is_connect_error(e):
+                    raise
+                response = None
+
+            if response is not None and response.status_code not in retry_status:
+                response.raise_for_status()
+                return response
+            if attempt >= self.max_retries:
+                response.raise_for_status()
+
+            delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+            if response is not None:
+                retry_after = parse_retry_after(response.headers.get("retry-after"))
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if response.status_code == 429:
+                    bucket.pause(delay)
+            telemetry.count("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -1,199 +1,681 @@
 #!/usr/bin/env python3
 """Batch generate Gamma presentations from a folder of markdown files."""
+import argparse
 import fnmatch
 import json
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Generator, Iterable, Iterator, Optional
+
+from cache import ResultCache, content_key
+from config import (
+    load_config,
+    config_exists,
+    daemon_enabled,
+    get_cache_path,
+    get_config_path,
+    get_manifest_path,
+    get_timings_path,
+)
+from discovery import DEFAULT_IGNORE, GitIgnore, walk_markdown
+from gamma_client import GammaAPIClient, PollStrategy
+from manifest import BatchManifest
+from markdown_utils import (
+    MAX_CARDS,
+    MAX_INPUT_TOKENS,
+    extract_title,
+    plan_decks,
+    prepare_content,
+    read_header,
+    read_markdown_file,
+)
+from output import atomic_write_text, is_complete_html, open_results_index, redirect_url
+from poller import StatusPoller
+from telemetry import FileTrace, TraceWriter, span, summarize, tracing
+from themes import resolve_theme_id
+
+
+def iter_presentation_files(
+    directory: Path,
+    pattern: str,
+    cache: Optional[ResultCache] = None,
+    config: Optional[dict] = None,
+    on_current: Optional[Callable[[Path], None]] = None,
+) -> Iterator[Path]:
+    """
+    Yield matching markdown files that need processing, as they are found.
 
-from config import load_config, config_exists, get_config_path
-from gamma_client import GammaAPIClient
-from markdown_utils import extract_title, read_markdown_file, prepare_content
-
+    Without a cache, a file needs processing when it has no corresponding
+    .html file. With a cache, a file also needs processing when its .html
+    was generated from different content or settings (stale), or no
+    longer points at the cached URL for the current content.
 
-def find_presentation_files(directory: Path, pattern: str) -> list[Path]:
-    """
-    Find all matching markdown files without corresponding .html files.
+    The walk honors batch_ignore, batch_max_depth and batch_gitignore from
+    config, and streams results so submission can start before it ends.
+    Files whose frontmatter sets `gamma: false` are skipped.
 
     Args:
         directory: Directory to search
         pattern: Glob pattern to match (e.g., "*_presentation.md")
+        cache: Result cache used to detect stale outputs
+        config: Loaded config (required with a cache)
+        on_current: Called with each matching file that is already up to date
+
+    Yields:
+        Markdown paths that need processing
+    """
+    config = config or {}
+    for md_file in walk_candidates(directory, pattern, config):
+        if needs_processing(md_file, cache, config):
+            yield md_file
+        elif on_current is not None:
+            on_current(md_file)
+
+
+def find_presentation_files(
+    directory: Path,
+    pattern: str,
+    cache: Optional[ResultCache] = None,
+    config: Optional[dict] = None,
+) -> list[Path]:
+    """
+    Find all matching markdown files that need processing.
+
+    Collects iter_presentation_files into a sorted list.
 
     Returns:
         List of markdown paths that need processing
     """
-    files_to_process = []
+    return sorted(iter_presentation_files(directory, pattern, cache, config))
+
+
+def walk_candidates(
+    directory: Path,
+    pattern: str,
+    config: dict,
+    gitignore: Optional[GitIgnore] = None,
+    directories: Optional[list] = None,
+) -> Iterator[Path]:
+    """
+    Walk directory for pattern with the batch_* walk settings from config.
+
+    gitignore and directories are passed through to walk_markdown.
+    """
+    max_depth = config.get("batch_max_depth", 0)
+    return walk_markdown(
+        directory,
+        pattern,
+        ignore=tuple(config.get("batch_ignore", DEFAULT_IGNORE)),
+        max_depth=int(max_depth) if max_depth else None,
+        use_gitignore=bool(config.get("batch_gitignore", False)),
+        gitignore=gitignore,
+        directories=directories,
+    )
+
+
+def needs_processing(md_file: Path, cache: Optional[ResultCache], config: dict) -> bool:
+    """
+    True if batch mode would generate md_file: it has no complete .html,
+    or (with a cache) its .html is outdated. Files opted out with
+    `gamma: false` never need processing.
+    """
+    if opted_out(md_file):
+        return False
+    html_file = md_file.with_suffix(".html")
+    if not is_complete_html(html_file):
+        return True
+    return cache is not None and _is_outdated(md_file, html_file, cache, config)
+
+
+def opted_out(md_file: Path) -> bool:
+    """True if the file's frontmatter sets `gamma: false`. Reads only the header."""
+    try:
+        header = read_header(str(md_file), want_title=False)
+    except (OSError, UnicodeDecodeError):
+        return False
+    return header["frontmatter"].get("gamma") is False
+
+
+def _is_outdated(md_file: Path, html_file: Path, cache: ResultCache, config: dict) -> bool:
+    """Check an existing .html against the cache for the current content."""
+    try:
+        key = content_key(prepare_file(md_file), config)
+    except (OSError, ValueError):
+        return False
+    return output_outdated(md_file, html_file, cache, key)
+
+
+def output_outdated(md_file: Path, html_file: Path, cache: ResultCache, key: str) -> bool:
+    """True if an existing .html was not generated from the content with this key."""
+    if cache.is_stale(md_file, key):
+        return True
+    cached_url = cache.get(key)
+    return cached_url is not None and redirect_url(html_file) != cached_url
+
+
+def file_title(content: str, file_path: Path) -> str:
+    """Title from frontmatter or the first heading, else derived from the filename."""
+    title = extract_title(content)
+    if not title:
+        # Use filename as fallback title
+        title = file_path.stem.replace("_presentation", "").replace("_", " ").title()
+    return title
+
+
+def prepare_file(file_path: Path) -> str:
+    """Read a markdown file and return the content sent to the API."""
+    content = read_markdown_file(str(file_path))
+    return prepare_content(content, file_title(content, file_path))
+
+
+def plan_file(file_path: Path, config: dict) -> tuple[str, list[dict]]:
+    """
+    Read a markdown file and plan the decks it is submitted as.
 
-    for md_file in directory.rglob(pattern):
-        html_file = md_file.with_suffix(".html")
-        if not html_file.exists():
-            files_to_process.append(md_file)
+    Returns:
+        Tuple of (prepared content, decks from plan_decks)
+
+    Raises:
+        ValueError: If the file cannot be split to fit the API limits
+    """
+    content = read_markdown_file(str(file_path))
+    title = file_title(content, file_path)
+    final_content = prepare_content(content, title)
+    return final_content, plan_content(final_content, title, config)
+
+
+def plan_content(final_content: str, title: str, config: dict) -> list[dict]:
+    """Split prepared content into decks within the configured API limits."""
+    return plan_decks(
+        final_content,
+        title,
+        card_split=config.get("card_split", "inputTextBreaks"),
+        max_tokens=int(config.get("max_input_tokens", MAX_INPUT_TOKENS)),
+        max_cards=int(config.get("max_cards", MAX_CARDS)),
+    )
 
-    return sorted(files_to_process)
+
+def deck_output_path(file_path: Path, index: int, total: int, variant: str = "") -> Path:
+    """
+    Redirect file for one deck: talk.html, or talk.part2.html for later parts.
+
+    A variant label (e.g. "document") is inserted before the part:
+    talk.document.html, talk.document.part2.html.
+    """
+    stem = f"{file_path.stem}.{variant}" if variant else file_path.stem
+    if index == 1:
+        return file_path.with_name(f"{stem}.html")
+    return file_path.with_name(f"{stem}.part{index}.html")
+
+
+def generation_request(
+    content: str,
+    config: dict,
+    num_cards: Optional[int] = None,
+) -> tuple[str, dict]:
+    """
+    Choose the client method and arguments for generating content.
+
+    num_cards comes from plan_decks; None keeps the client default.
+
+    Returns:
+        Tuple of (client method name, keyword arguments), shared by the
+        sync and async clients
+    """
+    # Map config image_source to API value
+    image_source_map = {
+        "ai": "aiGenerated",
+        "unsplash": "unsplash",
+        "giphy": "giphy",
+        "pexels": "webFreeToUse",
+        "pictographic": "pictographic",
+        "none": "noImages",
+    }
+    image_source = image_source_map.get(config.get("image_source", "ai"), "aiGenerated")
+
+    # Check if using template
+    template_id = config.get("template", "").strip()
+    theme_id = config.get("theme", "").strip() or None
+
+    if template_id:
+        return "create_from_template", {
+            "gamma_id": template_id,
+            "prompt": content,
+            "theme_id": theme_id,
+        }
+    kwargs = {
+        "input_text": content,
+        "text_mode": config.get("text_mode", "preserve"),
+        "format_type": config.get("format", "presentation"),
+        "theme_id": theme_id,
+        "card_split": config.get("card_split", "inputTextBreaks"),
+        "image_source": image_source,
+    }
+    if num_cards is not None:
+        kwargs["num_cards"] = num_cards
+    return "generate_presentation", kwargs
+
+
+def write_redirect(file_path: Path, gamma_url: str, html_path: Optional[Path] = None) -> Path:
+    """Write the .html redirect next to a source file. Returns its path."""
+    if html_path is None:
+        html_path = file_path.with_suffix(".html")
+    html_content = f'''<!DOCTYPE html>
+<html>
+<head><meta http-equiv="refresh" content="0;url={gamma_url}"></head>
+</html>'''
+    # Write-then-rename: a crash never leaves a truncated redirect behind
+    atomic_write_text(html_path, html_content)
+    return html_path
+
+
+def _wait_for(
+    client: GammaAPIClient,
+    poller: Optional[StatusPoller],
+    generation_id: str,
+    on_status=None,
+) -> dict:
+    """Wait for a generation on the shared poller, or a private one."""
+    if poller is None:
+        with StatusPoller(client, PollStrategy(get_timings_path())) as own_poller:
+            return own_poller.wait(generation_id, on_status)
+    return poller.wait(generation_id, on_status)
 
 
 def generate_single(
     client: GammaAPIClient,
     file_path: Path,
     config: dict,
+    poller: Optional[StatusPoller] = None,
+    cache: Optional[ResultCache] = None,
+    use_cache: bool = True,
+    manifest: Optional[BatchManifest] = None,
 ) -> dict:
     """
     Generate a single presentation.
 
-    Returns dict with success, url, error, etc.
+    If a shared poller is given, completion is tracked there alongside
+    the rest of the batch; otherwise a private poller is used. If a cache
+    is given and already holds a URL for this exact content and config,
+    the HTML redirect is written without calling the API (unless
+    use_cache is False). New results are always recorded in the cache.
+
+    If a manifest is given, the submission and every status change are
+    recorded in it, and a generation left in flight by an interrupted
+    run is reattached instead of resubmitted.
+
+    A file too large for one generation is split into several decks
+    (see plan_decks) generated in parallel; the first is written to the
+    usual .html and later ones to .partN.html, and the result lists
+    every part.
+
+    Every result carries a `timing` dict with per-phase seconds (read,
+    submit, queue, write) and request counters for this file.
+
+    Returns dict with success, url, error, timing, etc.
     """
+    trace = FileTrace(str(file_path))
+    with tracing(trace):
+        result = _generate_single(
+            client, file_path, config, poller, cache, use_cache, manifest
+        )
+    result["timing"] = trace.to_dict()
+    return result
+
+
+def _generate_single(
+    client: GammaAPIClient,
+    file_path: Path,
+    config: dict,
+    poller: Optional[StatusPoller],
+    cache: Optional[ResultCache],
+    use_cache: bool,
+    manifest: Optional[BatchManifest],
+) -> dict:
     try:
-        # Read and prepare content
-        content = read_markdown_file(str(file_path))
-        title = extract_title(content)
-
-        if not title:
-            # Use filename as fallback title
-            title = file_path.stem.replace("_presentation", "").replace("_", " ").title()
-
-        final_content = prepare_content(content, title)
-
-        # Map config image_source to API value
-        image_source_map = {
-            "ai": "aiGenerated",
-            "unsplash": "unsplash",
-            "giphy": "giphy",
-            "pexels": "webFreeToUse",
-            "pictographic": "pictographic",
-            "none": "noImages",
+        # Read, prepare and plan content
+        with span("read"):
+            final_content, decks = plan_file(file_path, config)
+            key = content_key(final_content, config)
+
+        if len(decks) == 1:
+            outcomes = [_generate_deck(
+                client, poller, str(file_path), final_content,
+                decks[0]["num_cards"], key, config, cache, use_cache, manifest,
+            )]
+        else:
+            # Oversized file: its decks are generated one after another
+            # inside this worker, so --concurrency still bounds the number
+            # of generations in flight; each has its own cache entry and
+            # manifest record
+            outcomes = [
+                _generate_deck(
+                    client, poller, f"{file_path}#part{index}",
+                    deck["content"], deck["num_cards"],
+                    content_key(deck["content"], config),
+                    config, cache, use_cache, manifest,
+                )
+                for index, deck in enumerate(decks, 1)
+            ]
+
+        return finish_file(file_path, key, outcomes, cache)
+
+    except Exception as e:
+        return {
+            "path": str(file_path),
+            "success": False,
+            "error": str(e)
         }
-        image_source = image_source_map.get(config.get("image_source", "ai"), "aiGenerated")
 
-        # Check if using template
-        template_id = config.get("template", "").strip()
-        theme_id = config.get("theme", "").strip() or None
 
-        if template_id:
-            result = client.create_from_template(
-                gamma_id=template_id,
-                prompt=final_content,
-                theme_id=theme_id,
-            )
+def _generate_deck(
+    client: GammaAPIClient,
+    poller: Optional[StatusPoller],
+    label: str,
+    content: str,
+    num_cards: int,
+    key: str,
+    config: dict,
+    cache: Optional[ResultCache],
+    use_cache: bool,
+    manifest: Optional[BatchManifest],
+) -> dict:
+    """
+    Generate one deck, reusing the cache or an interrupted run's generation.
+
+    Runs the steps of deck_steps, submitting and waiting on the shared
+    poller (or a private one) as they ask.
+
+    Returns dict with success, key, url, cached, resumed, or error.
+    """
+    steps = deck_steps(label, content, num_cards, key, config, cache, use_cache, manifest)
+    reply = None
+    while True:
+        try:
+            step = steps.send(reply)
+        except StopIteration as done:
+            return done.value
+        if step[0] == "submit":
+            _, method, kwargs = step
+            reply = getattr(client, method)(**kwargs)
         else:
-            result = client.generate_presentation(
-                input_text=final_content,
-                text_mode=config.get("text_mode", "preserve"),
-                format_type="presentation",
-                theme_id=theme_id,
-                card_split=config.get("card_split", "inputTextBreaks"),
-                image_source=image_source,
-            )
+            _, generation_id, on_status = step
+            reply = _wait_for(client, poller, generation_id, on_status)
+
+
+def deck_steps(
+    label: str,
+    content: str,
+    num_cards: int,
+    key: str,
+    config: dict,
+    cache: Optional[ResultCache],
+    use_cache: bool,
+    manifest: Optional[BatchManifest],
+) -> Generator[tuple, dict, dict]:
+    """
+    The steps of generating one deck, shared by the threaded and asyncio drivers.
+
+    Cache lookups and manifest records happen here; the API calls are
+    left to the driver. The generator yields
+
+        ("submit", method, kwargs): call getattr(client, method)(**kwargs)
+            and send back the response dict
+        ("wait", generation_id, on_status): wait for the generation,
+            calling on_status on status changes, and send back its
+            final status dict
+
+    label identifies the deck in the manifest: the file path, or
+    "<file>#partN" for decks of a split file.
 
+    Returns (as the StopIteration value) a dict with success, key, url,
+    cached, resumed, or error.
+    """
+    def note(event: str, **fields) -> None:
+        if manifest is not None:
+            manifest.record(label, event, **fields)
+
+    gamma_url = cache.get(key) if cache is not None and use_cache else None
+    if gamma_url is not None:
+        return {"success": True, "key": key, "url": gamma_url, "cached": True, "resumed": False}
+
+    resumed = False
+    state = manifest.resume_state(label, key) if manifest is not None else None
+    status = None
+
+    if state is not None and state["status"] == "completed":
+        # Finished before the interruption, redirect never written
+        status = {"status": "completed", "gammaUrl": state["url"]}
+        resumed = True
+    elif state is not None and state.get("generation_id"):
+        # Reattach to the generation submitted by an interrupted run
+        with span("queue"):
+            status = yield (
+                "wait", state["generation_id"], lambda s: note("status", status=s)
+            )
+        resumed = status.get("status") == "completed"
+        if not resumed:
+            note("failed", error=status.get("error", "Generation failed"))
+            status = None
+
+    if status is None:
+        method, kwargs = generation_request(content, config, num_cards)
+        with span("submit"):
+            result = yield ("submit", method, kwargs)
         generation_id = result.get("generationId")
         if not generation_id:
-            return {
-                "path": str(file_path),
-                "success": False,
-                "error": "No generation ID returned"
-            }
-
-        # Poll for completion (max 2 minutes)
-        max_attempts = 60
-        for _ in range(max_attempts):
-            time.sleep(2)
-            status = client.get_generation_status(generation_id)
-
-            if status.get("status") == "completed":
-                gamma_url = status.get("gammaUrl", status.get("url"))
-
-                # Create HTML redirect file
-                html_path = file_path.with_suffix(".html")
-                html_content = f'''<!DOCTYPE html>
-<html>
-<head><meta http-equiv="refresh" content="0;url={gamma_url}"></head>
-</html>'''
-                html_path.write_text(html_content, encoding="utf-8")
-
-                return {
-                    "path": str(file_path),
-                    "success": True,
-                    "url": gamma_url,
-                    "html_path": str(html_path),
-                }
-
-            elif status.get("status") == "failed":
-                return {
-                    "path": str(file_path),
-                    "success": False,
-                    "error": status.get("error", "Generation failed")
-                }
+            return {"success": False, "error": "No generation ID returned"}
+        note("submitted", key=key, generation_id=generation_id)
 
-        return {
-            "path": str(file_path),
-            "success": False,
-            "error": "Timeout: Generation took longer than 2 minutes"
-        }
+        # Wait for completion on the shared poller (max 2 minutes)
+        with span("queue"):
+            status = yield ("wait", generation_id, lambda s: note("status", status=s))
 
-    except Exception as e:
+    if status.get("status") != "completed":
+        error = status.get("error", "Generation failed")
+        note("failed", error=error)
+        return {"success": False, "error": error}
+
+    gamma_url = status.get("gammaUrl", status.get("url"))
+    note("completed", url=gamma_url)
+    return {"success": True, "key": key, "url": gamma_url, "cached": False, "resumed": resumed}
+
+
+def finish_file(
+    file_path: Path,
+    key: str,
+    outcomes: list[dict],
+    cache: Optional[ResultCache],
+) -> dict:
+    """Write redirects for a file's decks and build its batch result."""
+    failed = [(i, o) for i, o in enumerate(outcomes, 1) if not o["success"]]
+    if failed:
+        index, outcome = failed[0]
+        error = outcome["error"]
+        if len(outcomes) > 1:
+            error = f"Part {index} of {len(outcomes)}: {error}"
         return {
             "path": str(file_path),
             "success": False,
-            "error": str(e)
+            "error": error
         }
 
+    # Create HTML redirect files
+    with span("write"):
+        urls = [o["url"] for o in outcomes]
+        html_paths = [
+            write_redirect(file_path, url, deck_output_path(file_path, index, len(urls)))
+            for index, url in enumerate(urls, 1)
+        ]
+        if cache is not None:
+            cache.record_source(file_path, key)
+            # Saved once by the caller when the batch is done
+            for outcome in outcomes:
+                if not outcome["cached"]:
+                    cache.put(outcome["key"], outcome["url"])
+
+    result = {
+        "path": str(file_path),
+        "success": True,
+        "url": urls[0],
+        "html_path": str(html_paths[0]),
+        "cached": all(o["cached"] for o in outcomes),
+        "resumed": any(o["resumed"] for o in outcomes),
+    }
+    if len(urls) > 1:
+        result["parts"] = [
+            {"url": url, "html_path": str(path)} for url, path in zip(urls, html_paths)
+        ]
+    return result
 
-def batch_generate(directory: str) -> dict:
-    """
-    Generate presentations for all matching files in a directory.
 
-    Args:
-        directory: Path to the directory to process
+def load_batch_settings(
+    directory: str,
+    concurrency: Optional[int] = None,
+) -> tuple[Path, dict, int]:
+    """
+    Validate the batch directory and load config and concurrency.
 
     Returns:
-        dict with total, success, failed counts and results array
+        Tuple of (resolved directory, config, concurrency)
+
+    Raises:
+        ValueError: With a user-facing message if the directory, config
+            or concurrency is invalid
     """
     dir_path = Path(directory).resolve()
 
     if not dir_path.exists():
-        return {
-            "success": False,
-            "error": f"Directory not found: {directory}"
-        }
+        raise ValueError(f"Directory not found: {directory}")
 
     if not dir_path.is_dir():
-        return {
-            "success": False,
-            "error": f"Not a directory: {directory}"
-        }
+        raise ValueError(f"Not a directory: {directory}")
 
     # Load config
     try:
         config = load_config()
     except FileNotFoundError:
-        return {
-            "success": False,
-            "error": f"Config not found. Create {get_config_path()}"
-        }
+        raise ValueError(f"Config not found. Create {get_config_path()}")
+
+    if concurrency is None:
+        concurrency = config.get("batch_concurrency", 1)
+    try:
+        concurrency = max(1, int(concurrency))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid batch_concurrency: {concurrency!r}")
+    return dir_path, config, concurrency
+
+
+def batch_generate(
+    directory: str,
+    concurrency: Optional[int] = None,
+    use_cache: bool = True,
+    use_async: bool = False,
+    trace_path: Optional[str] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+    client: Optional[GammaAPIClient] = None,
+    poller: Optional[StatusPoller] = None,
+) -> dict:
+    """
+    Generate presentations for all matching files in a directory.
+
+    Args:
+        directory: Path to the directory to process
+        concurrency: Number of generations to keep in flight at once
+            (defaults to batch_concurrency from config)
+        use_cache: Reuse cached results and regenerate stale outputs;
+            when False only files without an .html are processed and
+            nothing is served from the cache
+        use_async: Drive the batch from one asyncio event loop instead of
+            a thread pool, for very high concurrency
+        trace_path: Also append each file's timing, then the batch
+            summary, to this JSONL file as they happen
+        on_result: Called with each file's result as soon as it finishes
+        client: Existing API client to reuse instead of creating one
+            (threaded driver only)
+        poller: Existing status poller for client (threaded driver only)
+
+    Returns:
+        dict with total, success, failed counts, results array and a
+        timing summary
+    """
+    try:
+        dir_path, config, concurrency = load_batch_settings(directory, concurrency)
     except ValueError as e:
         return {"success": False, "error": str(e)}
 
-    # Find files
-    pattern = config.get("batch_pattern", "*_presentation.md")
-    files = find_presentation_files(dir_path, pattern)
+    # Resolve a theme name to its id once for the whole batch
+    config["theme"] = resolve_theme_id(config) or ""
 
-    if not files:
+    cache = ResultCache(
+        get_cache_path(),
+        max_entries=config.get("cache_max_entries", 1000),
+        max_age_days=config.get("cache_max_age_days", 90),
+    )
+
+    # Generations left in flight by an interrupted run are reattached
+    manifest = BatchManifest(get_manifest_path())
+
+    # Find files lazily: submission starts as soon as the walk yields the
+    # first candidate and overlaps with the rest of the walk
+    # Up-to-date files missing from the results index (e.g. generated
+    # before it existed) are added from their redirects as they are walked
+    index = open_results_index(config)
+    pattern = config.get("batch_pattern", "*_presentation.md")
+    files = iter_presentation_files(
+        dir_path, pattern, cache if use_cache else None, config,
+        on_current=index.record_existing if index is not None else None,
+    )
+
+    writer = TraceWriter(Path(trace_path)) if trace_path else None
+
+    def report(result: dict) -> None:
+        if index is not None:
+            index.record_result(result)
+        if writer is not None:
+            writer.write({
+                "type": "file",
+                "path": result["path"],
+                "success": result.get("success", False),
+                **result.get("timing", {}),
+            })
+        if on_result is not None:
+            on_result(result)
+
+    start = time.monotonic()
+    try:
+        if use_async:
+            from async_batch import run_async_batch
+            results = run_async_batch(
+                files, config, concurrency, cache, use_cache, manifest, report
+            )
+        else:
+            results = run_threaded(
+                files, config, concurrency, cache, use_cache, manifest, report,
+                client, poller,
+            )
+    finally:
+        # Save even after an interruption, so finished decks stay cached
+        cache.save()
+        if index is not None:
+            index.close()
+    timing = summarize([r.get("timing", {}) for r in results], time.monotonic() - start)
+    if writer is not None:
+        writer.write({"type": "batch", **timing})
+
+    if not results:
         return {
             "success": True,
             "total": 0,
             "processed": 0,
             "failed": 0,
             "results": [],
-            "message": f"No files matching '{pattern}' need processing (all have .html files)"
+            "message": f"No files matching '{pattern}' need processing (all have up-to-date .html files)"
         }
 
-    # Create client
-    client = GammaAPIClient(config["api_key"])
-
-    # Process files sequentially to avoid rate limits
-    results = []
-    for file_path in files:
-        result = generate_single(client, file_path, config)
-        results.append(result)
+    manifest.compact()
 
     # Calculate summary
     successes = [r for r in results if r.get("success")]
@@ -201,21 +683,134 @@ def batch_generate(directory: str) -> dict:
 
     return {
         "success": len(failures) == 0,
-        "total": len(files),
+        "total": len(results),
         "processed": len(successes),
+        "cached": len([r for r in successes if r.get("cached")]),
+        "resumed": len([r for r in successes if r.get("resumed")]),
         "failed": len(failures),
         "results": results,
+        "timing": timing,
     }
 
 
+def run_threaded(
+    files: Iterable[Path],
+    config: dict,
+    concurrency: int,
+    cache: ResultCache,
+    use_cache: bool,
+    manifest: BatchManifest,
+    on_result: Callable[[dict], None],
+    client: Optional[GammaAPIClient] = None,
+    poller: Optional[StatusPoller] = None,
+) -> list[dict]:
+    """
+    Process files on a thread pool sharing one client and poller.
+
+    Files are consumed as they are discovered; results keep discovery order.
+    on_result is called with each result as soon as its file finishes.
+    A given client and poller are used as-is and left open.
+    """
+    # Create client (one session shared by all workers)
+    if client is None:
+        client = GammaAPIClient.from_config(config, pool_size=max(10, concurrency))
+
+    # Keep up to `concurrency` generations in flight; map() yields results
+    # in input order regardless of completion order. All in-flight
+    # generations share one status poller.
+    own_poller = poller is None
+    if own_poller:
+        poller = StatusPoller(client, PollStrategy(get_timings_path()))
+    try:
+        def process(file_path: Path) -> dict:
+            result = generate_single(
+                client, file_path, config, poller, cache, use_cache, manifest
+            )
+            on_result(result)
+            return result
+
+        if concurrency == 1:
+            results = [process(file_path) for file_path in files]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(process, files))
+    finally:
+        if own_poller:
+            poller.close()
+    return results
+
+
 def main():
     """CLI entry point."""
-    if len(sys.argv) < 2:
-        print(json.dumps({"success": False, "error": "Usage: batch.py <directory>"}))
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("directory", nargs="?")
+    parser.add_argument("--concurrency", default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--trace", default=None)
+    parser.add_argument("--daemon", action="store_true")
+    parser.add_argument("--no-wait", action="store_true")
+    parser.add_argument("--progress", action="store_true")
+    parser.add_argument("--plan", action="store_true")
+    parser.add_argument("--watch", action="store_true")
+    args, unknown = parser.parse_known_args()
+
+    if not args.directory or unknown:
+        print(json.dumps({
+            "success": False,
+            "error": "Usage: batch.py <directory> [--concurrency N] [--no-cache] [--async] "
+                     "[--trace FILE] [--daemon [--no-wait] [--progress]] [--plan | --watch]"
+        }))
         sys.exit(1)
 
-    directory = sys.argv[1]
-    result = batch_generate(directory)
+    if args.plan:
+        # Dry run: no API calls, so there is nothing for the daemon to keep warm
+        from planner import plan_batch
+        result = plan_batch(
+            args.directory,
+            concurrency=args.concurrency,
+            use_cache=not args.no_cache,
+        )
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result.get("success") else 1)
+
+    if args.watch:
+        # Runs in the foreground until interrupted, printing events as JSON lines
+        from watcher import watch_batch
+        result = watch_batch(
+            args.directory,
+            concurrency=args.concurrency,
+            use_cache=not args.no_cache,
+            on_event=lambda event: print(json.dumps(event), flush=True),
+        )
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result.get("success") else 1)
+
+    result = None
+    if daemon_enabled(args.daemon):
+        # Hand the job to the warm daemon; None means run it here instead
+        from daemon import run_job
+        result = run_job(
+            {
+                "op": "batch",
+                "directory": str(Path(args.directory).resolve()),
+                "concurrency": args.concurrency,
+                "use_cache": not args.no_cache,
+                "use_async": args.use_async,
+                "trace": str(Path(args.trace).resolve()) if args.trace else None,
+                "wait": not args.no_wait,
+                "progress": args.progress,
+            },
+            on_event=lambda event: print(json.dumps(event), flush=True),
+        )
+    if result is None:
+        result = batch_generate(
+            args.directory,
+            concurrency=args.concurrency,
+            use_cache=not args.no_cache,
+            use_async=args.use_async,
+            trace_path=args.trace,
+        )
 
     print(json.dumps(result, indent=2))
     sys.exit(0 if result.get("success") else 1)
@@ -0,0 +1,139 @@
+"""Persistent content-hash cache of generated Gamma URLs."""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Config keys that change what Gamma generates for the same content
+CACHE_CONFIG_KEYS = ("theme", "template", "text_mode", "image_source", "card_split")
+
+
+def content_key(content: str, config: dict) -> str:
+    """
+    Hash prepared content together with the effective generation config.
+
+    Args:
+        content: Output of prepare_content (what is sent to the API)
+        config: Loaded rt-gamma config
+
+    Returns:
+        Hex digest identifying this exact generation request
+    """
+    settings = {k: str(config.get(k, "")).strip() for k in CACHE_CONFIG_KEYS}
+    # Only set for fan-out variants; presentation keys stay as they were
+    if config.get("format", "presentation") != "presentation":
+        settings["format"] = config["format"]
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Map content keys to generated gammaUrls, persisted as JSON.
+
+    Also remembers which key each source file was last generated from,
+    so an existing .html can be recognized as stale after its markdown
+    changes. Entries are evicted when unused for max_age_days and, beyond
+    max_entries, least recently used first.
+
+    Changes are kept in memory until save(), which merges them into the
+    file as it is on disk then, so processes sharing the cache do not
+    drop each other's entries.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 1000, max_age_days: float = 90):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        # Sources recorded since the last save; these win over the file
+        self._changed_sources = set()
+        self._entries, self._sources = self._read()
+
+    def _read(self) -> tuple[dict, dict]:
+        """Entries and sources currently on disk."""
+        if not self.path.exists():
+            return {}, {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return dict(data.get("entries", {})), dict(data.get("sources", {}))
+        except (OSError, ValueError, AttributeError):
+            # A corrupt cache only costs regenerations; start fresh
+            return {}, {}
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached gammaUrl for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.get("last_used", 0) > self.max_age:
+                del self._entries[key]
+                return None
+            entry["last_used"] = time.time()
+            return entry.get("url")
+
+    def put(self, key: str, url: str, source: Optional[Path] = None) -> None:
+        """Record a generated URL. Call save() to persist it."""
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {"url": url, "created": now, "last_used": now}
+            if source is not None:
+                self._sources[str(source)] = key
+                self._changed_sources.add(str(source))
+
+    def record_source(self, source: Path, key: str) -> None:
+        """Remember that a source file's current output came from key."""
+        with self._lock:
+            self._sources[str(source)] = key
+            self._changed_sources.add(str(source))
+
+    def source_key(self, source: Path) -> Optional[str]:
+        """Key the source file's existing output was generated from, if known."""
+        with self._lock:
+            return self._sources.get(str(source))
+
+    def is_stale(self, source: Path, key: str) -> bool:
+        """True if source's existing output was generated from other content."""
+        previous = self.source_key(source)
+        return previous is not None and previous != key
+
+    def _evict(self) -> None:
+        now = time.time()
+        self._entries = {
+            k: v for k, v in self._entries.items()
+            if now - v.get("last_used", 0) <= self.max_age
+        }
+        if len(self._entries) > self.max_entries:
+            by_use = sorted(self._entries.items(), key=lambda kv: kv[1].get("last_used", 0))
+            self._entries = dict(by_use[-self.max_entries:])
+
+    def _merge(self, entries: dict, sources: dict) -> None:
+        """Fold in what another process saved: newest use wins per key."""
+        for key, entry in entries.items():
+            mine = self._entries.get(key)
+            if mine is None or entry.get("last_used", 0) > mine.get("last_used", 0):
+                self._entries[key] = entry
+        changed = {s: self._sources[s] for s in self._changed_sources}
+        self._sources = {**self._sources, **sources, **changed}
+        self._changed_sources.clear()
+
+    def save(self) -> None:
+        """Merge with the file on disk, evict expired entries and write it atomically."""
+        with self._lock:
+            self._merge(*self._read())
+            self._evict()
+            data = json.dumps({"entries": self._entries, "sources": self._sources})
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(data, encoding="utf-8")
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
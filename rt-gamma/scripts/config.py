@@ -1,38 +1,68 @@
 """Configuration management for rt-gamma plugin."""
 import os
-import sys
 from pathlib import Path
 from typing import Optional
 
-# Python 3.11+ has tomllib built-in
-if sys.version_info >= (3, 11):
-    import tomllib
-else:
-    try:
-        import tomli as tomllib
-    except ImportError:
-        import subprocess
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "tomli", "-q"])
-        import tomli as tomllib
+from project_config import find_project_root, load_toml
 
 
-def find_project_root() -> Path:
-    """Find the project root by looking for .claude directory."""
-    # Start from current working directory
-    current = Path.cwd()
+def get_config_path() -> Path:
+    """Get the path to the rt-gamma config file."""
+    return find_project_root() / ".claude" / "rt-gamma.toml"
 
-    # Walk up looking for .claude directory
-    for parent in [current] + list(current.parents):
-        if (parent / ".claude").is_dir():
-            return parent
 
-    # Fallback to current directory
-    return current
+def get_timings_path() -> Path:
+    """Get the path to the recent generation timings file."""
+    return find_project_root() / ".claude" / "rt-gamma-timings.json"
 
 
-def get_config_path() -> Path:
-    """Get the path to the rt-gamma config file."""
-    return find_project_root() / ".claude" / "rt-gamma.toml"
+def get_cache_path() -> Path:
+    """Get the path to the generation result cache."""
+    return find_project_root() / ".claude" / "rt-gamma-cache.json"
+
+
+def get_manifest_path() -> Path:
+    """Get the path to the batch manifest used for crash-safe resume."""
+    return find_project_root() / ".claude" / "rt-gamma-manifest.jsonl"
+
+
+def get_themes_path() -> Path:
+    """Get the path to the cached theme catalog."""
+    return find_project_root() / ".claude" / "rt-gamma-themes.json"
+
+
+def get_results_index_path(config: dict) -> Optional[Path]:
+    """
+    Get the path of the results index from config, or None if disabled.
+
+    Relative paths are resolved against the project root.
+    """
+    value = str(config.get("results_index", ".claude/rt-gamma-index.json")).strip()
+    if not value:
+        return None
+    return find_project_root() / Path(value).expanduser()
+
+
+def get_daemon_socket_path() -> Path:
+    """
+    Get the Unix socket path of this project's rt-gamma daemon.
+
+    Lives in XDG_RUNTIME_DIR rather than .claude, since socket paths are
+    limited to about 100 characters. Without XDG_RUNTIME_DIR it goes in a
+    per-user folder in the temp dir, never in the shared temp dir itself;
+    the daemon checks that folder is private before using it.
+    """
+    import hashlib
+    import tempfile
+
+    root = str(find_project_root())
+    digest = hashlib.sha256(root.encode("utf-8")).hexdigest()[:12]
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        base = Path(base)
+    else:
+        base = Path(tempfile.gettempdir()) / f"rt-gamma-{os.getuid()}"
+    return base / f"rt-gamma-{digest}.sock"
 
 
 def config_exists() -> bool:
@@ -58,15 +88,35 @@ def load_config() -> dict:
         "image_source": "ai",
         "card_split": "inputTextBreaks",
         "batch_pattern": "*_presentation.md",
+        "batch_ignore": [".git", "node_modules", ".venv", "venv", "__pycache__"],
+        "batch_max_depth": 0,
+        "batch_gitignore": False,
+        "batch_concurrency": 1,
+        "api_base_url": "",
+        "rate_limit_create": 30,
+        "rate_limit_status": 120,
+        "max_retries": 4,
+        "cache_max_entries": 1000,
+        "cache_max_age_days": 90,
+        "theme_cache_ttl_hours": 24,
+        "max_input_tokens": 100000,
+        "max_cards": 60,
+        "daemon": False,
+        "daemon_idle_minutes": 30,
+        "credits_per_card": 3,
+        "credits_per_deck": 0,
+        "watch_debounce_ms": 500,
+        "watch_poll_seconds": 2,
+        "watch_backend": "auto",
+        "results_index": ".claude/rt-gamma-index.json",
     }
 
-    if not config_path.exists():
+    # Load TOML (parsed once per process while the file is unchanged)
+    try:
+        user_config = load_toml(config_path)
+    except FileNotFoundError:
         raise FileNotFoundError(f"Config file not found: {config_path}")
 
-    # Load TOML
-    with open(config_path, "rb") as f:
-        user_config = tomllib.load(f)
-
     # Merge with defaults
     config = {**defaults, **user_config}
 
@@ -80,6 +130,16 @@ def load_config() -> dict:
     return config
 
 
+def daemon_enabled(flag: bool = False) -> bool:
+    """True if --daemon was passed or config sets `daemon = true`."""
+    if flag:
+        return True
+    try:
+        return bool(load_config().get("daemon", False))
+    except (FileNotFoundError, ValueError):
+        return False
+
+
 def create_config_template(path: Optional[Path] = None) -> Path:
     """
     Create a config file with placeholder values.
@@ -98,7 +158,7 @@ def create_config_template(path: Optional[Path] = None) -> Path:
 # Required: Your Gamma API key
 api_key = ""
 
-# Optional: Default Gamma theme ID (leave empty for Gamma default)
+# Optional: Default Gamma theme ID or name (leave empty for Gamma default)
 theme = ""
 
 # Optional: Default Gamma template ID for template-based generation
@@ -115,6 +175,9 @@ card_split = "inputTextBreaks"
 
 # Batch mode: file pattern to match
 batch_pattern = "*_presentation.md"
+
+# Batch mode: number of generations kept in flight at once
+batch_concurrency = 1
 '''
 
     path.write_text(template, encoding="utf-8")
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Optional long-lived rt-gamma worker, reachable over a Unix socket.
+
+The daemon keeps a warm GammaAPIClient (connection pool and rate
+buckets) and one status poller across invocations, and runs generate and
+batch jobs from a queue, one at a time. generate.py and batch.py hand
+their work to it with --daemon (or `daemon = true` in config), starting
+it on first use. It exits after daemon_idle_minutes without jobs.
+
+Protocol: the client sends one JSON request line and reads JSON event
+lines back ({"event": "queued" | "started" | "file" | "result", ...}).
+
+Usage: daemon.py serve | status [JOB] | watch JOB | stop
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import stat
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from config import find_project_root, get_daemon_socket_path
+
+# Seconds to wait for a freshly started daemon to accept connections
+START_TIMEOUT = 10.0
+# Finished jobs kept for `status` and `watch`
+MAX_FINISHED_JOBS = 100
+
+
+class Job:
+    """A queued generate or batch request and the events it has produced."""
+
+    def __init__(self, kind: str, request: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.request = request
+        self.status = "queued"
+        self.result = None
+        self.events = []
+        self._cond = threading.Condition()
+
+    def emit(self, event: str, **fields) -> None:
+        with self._cond:
+            record = {"event": event, "job": self.id, **fields}
+            self.events.append(record)
+            if event == "started":
+                self.status = "running"
+            elif event == "result":
+                self.status = "done"
+                self.result = fields.get("result")
+            self._cond.notify_all()
+
+    def follow(self) -> Iterator[dict]:
+        """Yield every event, past and future, until the result."""
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.events):
+                    self._cond.wait()
+                pending = self.events[index:]
+            index += len(pending)
+            for record in pending:
+                yield record
+                if record["event"] == "result":
+                    return
+
+    def summary(self) -> dict:
+        target = self.request.get("path") or self.request.get("directory")
+        info = {"job": self.id, "kind": self.kind, "target": target, "status": self.status}
+        if self.result is not None:
+            info["result"] = self.result
+        return info
+
+
+class Daemon:
+    """Job queue and warm API client shared by every connection."""
+
+    def __init__(self, idle_timeout: float):
+        # Heavy imports only in the server process, not in thin clients
+        from batch import batch_generate
+        from generate import generate_presentation
+
+        self._batch_generate = batch_generate
+        self._generate_presentation = generate_presentation
+        self.idle_timeout = idle_timeout
+        self.jobs = {}
+        self.queue = queue.Queue()
+        self.last_active = time.monotonic()
+        self._lock = threading.Lock()
+        self._client = None
+        self._client_key = None
+        self._poller = None
+        threading.Thread(target=self._work, name="rt-gamma-jobs", daemon=True).start()
+
+    def submit(self, kind: str, request: dict) -> Job:
+        job = Job(kind, request)
+        with self._lock:
+            self.jobs[job.id] = job
+            self.last_active = time.monotonic()
+        job.emit("queued", position=self.queue.qsize())
+        self.queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> list[dict]:
+        """Summaries of queued, running and recently finished jobs."""
+        with self._lock:
+            return [
+                {k: v for k, v in job.summary().items() if k != "result"}
+                for job in self.jobs.values()
+            ]
+
+    def idle(self) -> bool:
+        with self._lock:
+            busy = any(job.status != "done" for job in self.jobs.values())
+            return not busy and time.monotonic() - self.last_active > self.idle_timeout
+
+    def close(self) -> None:
+        if self._poller is not None:
+            self._poller.close()
+
+    def _work(self) -> None:
+        while True:
+            job = self.queue.get()
+            job.emit("started")
+            try:
+                result = self._run(job)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            job.emit("result", result=result)
+            with self._lock:
+                self.last_active = time.monotonic()
+                self._trim()
+
+    def _run(self, job: Job) -> dict:
+        request = job.request
+        client, poller = self._warm_client()
+        if job.kind == "generate":
+            return self._generate_presentation(
+                request["path"],
+                use_cache=request.get("use_cache", True),
+                trace_path=request.get("trace"),
+                client=client,
+                poller=poller,
+                formats=request.get("formats"),
+                themes=request.get("themes"),
+            )
+        return self._batch_generate(
+            request["directory"],
+            concurrency=request.get("concurrency"),
+            use_cache=request.get("use_cache", True),
+            use_async=request.get("use_async", False),
+            trace_path=request.get("trace"),
+            on_result=lambda result: job.emit("file", result=result),
+            client=client,
+            poller=poller,
+        )
+
+    def _warm_client(self) -> tuple:
+        """
+        Return the shared client and poller, rebuilt if the API settings changed.
+
+        Returns (None, None) if config cannot be loaded, so the job
+        reports the config error itself.
+        """
+        from config import get_timings_path, load_config
+        from gamma_client import GammaAPIClient, PollStrategy
+        from poller import StatusPoller
+
+        try:
+            config = load_config()
+        except (FileNotFoundError, ValueError):
+            return None, None
+
+        key = tuple(
+            str(config.get(name)) for name in
+            ("api_key", "api_base_url", "rate_limit_create", "rate_limit_status", "max_retries")
+        )
+        if key != self._client_key:
+            if self._poller is not None:
+                self._poller.close()
+            self._client = GammaAPIClient.from_config(config, pool_size=50)
+            self._poller = StatusPoller(self._client, PollStrategy(get_timings_path()))
+            self._client_key = key
+        return self._client, self._poller
+
+    def _trim(self) -> None:
+        finished = [j for j in self.jobs.values() if j.status == "done"]
+        for job in finished[:-MAX_FINISHED_JOBS]:
+            del self.jobs[job.id]
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """One request per connection; replies are JSON lines."""
+
+    def send(self, record: dict) -> None:
+        self.wfile.write((json.dumps(record) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        daemon = self.server.daemon
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+            op = request.get("op")
+        except (ValueError, AttributeError):
+            self.send({"event": "error", "error": "Invalid request"})
+            return
+
+        try:
+            if op == "ping":
+                self.send({"event": "pong", "pid": os.getpid()})
+            elif op in ("generate", "batch"):
+                job = daemon.submit(op, request)
+                if not request.get("wait", True):
+                    self.send(job.events[0])
+                    return
+                self._stream(job, request.get("progress", False))
+            elif op == "watch":
+                job = daemon.get(request.get("job", ""))
+                if job is None:
+                    self.send({"event": "error", "error": f"Unknown job: {request.get('job')}"})
+                    return
+                self._stream(job, True)
+            elif op == "status":
+                if request.get("job"):
+                    job = daemon.get(request["job"])
+                    if job is None:
+                        self.send({"event": "error", "error": f"Unknown job: {request['job']}"})
+                        return
+                    self.send({"event": "status", **job.summary()})
+                else:
+                    self.send({"event": "status", "pid": os.getpid(), "jobs": daemon.list_jobs()})
+            elif op == "stop":
+                self.send({"event": "stopping", "pid": os.getpid()})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                self.send({"event": "error", "error": f"Unknown op: {op}"})
+        except OSError:
+            # Client went away; the job keeps running
+            pass
+
+    def _stream(self, job: Job, progress: bool) -> None:
+        for record in job.follow():
+            if progress or record["event"] == "result":
+                self.send(record)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, daemon: Daemon):
+        self.daemon = daemon
+        super().__init__(path, Handler)
+
+
+def supported() -> bool:
+    """The daemon needs Unix domain sockets."""
+    return hasattr(socket, "AF_UNIX") and hasattr(socketserver, "UnixStreamServer")
+
+
+def _private_dir(directory: Path) -> Path:
+    """
+    Create directory (mode 0700) if needed and check only this user can use it.
+
+    Raises:
+        RuntimeError: If it is a symlink, owned by someone else, or open
+            to other users, so a socket in it could be reached or faked
+    """
+    try:
+        directory.mkdir(mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+    except OSError as e:
+        raise RuntimeError(f"Cannot create socket folder {directory}: {e}")
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise RuntimeError(f"Socket folder {directory} is not private to this user")
+    return directory
+
+
+def _connect(path: Path) -> Optional[socket.socket]:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def start_daemon() -> socket.socket:
+    """Start a daemon for this project in the background and connect to it."""
+    path = get_daemon_socket_path()
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "serve"],
+        cwd=str(find_project_root()),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        sock = _connect(path)
+        if sock is not None:
+            return sock
+        time.sleep(0.05)
+    raise RuntimeError(f"rt-gamma daemon did not start (socket {path})")
+
+
+def send_request(request: dict, autostart: bool = True) -> Iterator[dict]:
+    """
+    Send one request to the project's daemon and yield its reply events.
+
+    Raises:
+        RuntimeError: If no daemon is running and autostart is False or fails
+    """
+    path = get_daemon_socket_path()
+    _private_dir(path.parent)
+    sock = _connect(path)
+    if sock is None:
+        if not autostart:
+            raise RuntimeError("rt-gamma daemon is not running")
+        sock = start_daemon()
+    with sock, sock.makefile("rb") as replies:
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        for line in replies:
+            yield json.loads(line)
+
+
+def run_job(
+    request: dict,
+    on_event: Optional[Callable[[dict], None]] = None,
+) -> Optional[dict]:
+    """
+    Run a generate/batch request on the daemon, starting it if needed.
+
+    Args:
+        request: Job request (op, path/directory and options; wait and
+            progress control what is streamed back)
+        on_event: Called with each progress event before the result
+
+    Returns:
+        The job's result dict (or the queued job info with wait=False),
+        or None if the daemon is unavailable on this platform so the
+        caller should run the job in-process
+    """
+    if not supported():
+        return None
+    try:
+        for record in send_request(request):
+            if record["event"] == "result":
+                return record["result"]
+            if record["event"] == "queued" and not request.get("wait", True):
+                return {"success": True, "job": record["job"], "status": "queued"}
+            if record["event"] == "error":
+                return {"success": False, "error": record["error"]}
+            if on_event is not None:
+                on_event(record)
+    except (OSError, RuntimeError, ValueError) as e:
+        return {"success": False, "error": f"rt-gamma daemon: {e}"}
+    return {"success": False, "error": "rt-gamma daemon closed the connection"}
+
+
+def serve() -> int:
+    """Run the daemon in the foreground until stopped or idle."""
+    from config import config_exists, load_config
+
+    path = get_daemon_socket_path()
+    try:
+        _private_dir(path.parent)
+    except RuntimeError as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        return 1
+    probe = _connect(path)
+    if probe is not None:
+        probe.close()
+        print(json.dumps({"success": False, "error": f"Daemon already running on {path}"}))
+        return 1
+    if path.exists():
+        # Left behind by a daemon that did not shut down cleanly
+        path.unlink()
+
+    idle_minutes = 30.0
+    if config_exists():
+        try:
+            idle_minutes = float(load_config().get("daemon_idle_minutes", 30))
+        except ValueError:
+            pass
+
+    daemon = Daemon(idle_timeout=idle_minutes * 60)
+    # Bind with a umask that leaves the socket owner-only from the start:
+    # jobs run with this user's API key
+    old_umask = os.umask(0o077)
+    try:
+        server = DaemonServer(str(path), daemon)
+    finally:
+        os.umask(old_umask)
+
+    def watch_idle() -> None:
+        while True:
+            time.sleep(min(30.0, max(1.0, daemon.idle_timeout / 4)))
+            if daemon.idle():
+                server.shutdown()
+                return
+
+    threading.Thread(target=watch_idle, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        daemon.close()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    return 0
+
+
+def main():
+    """CLI entry point."""
+    args = sys.argv[1:]
+    command = args[0] if args else ""
+
+    if not supported():
+        print(json.dumps({"success": False, "error": "The rt-gamma daemon needs Unix domain sockets"}))
+        sys.exit(1)
+
+    if command == "serve" and len(args) == 1:
+        sys.exit(serve())
+
+    if command == "status" and len(args) <= 2:
+        request = {"op": "status", "job": args[1] if len(args) == 2 else None}
+    elif command == "watch" and len(args) == 2:
+        request = {"op": "watch", "job": args[1]}
+    elif command == "stop" and len(args) == 1:
+        request = {"op": "stop"}
+    else:
+        print(json.dumps({
+            "success": False,
+            "error": "Usage: daemon.py serve | status [JOB] | watch JOB | stop"
+        }))
+        sys.exit(1)
+
+    try:
+        for record in send_request(request, autostart=False):
+            print(json.dumps(record))
+    except RuntimeError as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Streaming discovery of markdown files in large directory trees."""
+import fnmatch
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Directories never worth descending into
+DEFAULT_IGNORE = (".git", "node_modules", ".venv", "venv", "__pycache__")
+
+
+class GitIgnore:
+    """
+    The common subset of .gitignore rules, scoped to where each file lives.
+
+    Supports comments, `!` negation, trailing `/` for directory-only
+    rules, anchored patterns (leading or inner `/`) and a leading `**/`.
+    As in git, the last matching rule wins.
+    """
+
+    def __init__(self):
+        self.rules = []
+
+    def add_file(self, path: Path, base: str) -> None:
+        """Add rules from a .gitignore whose directory is `base` (relative, '' for root)."""
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            return
+
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if line.startswith("**/"):
+                line = line[3:]
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if line:
+                self.rules.append((base, line, negate, dir_only, anchored))
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Check a path relative to the walk root ('/'-separated)."""
+        result = False
+        name = rel_path.rsplit("/", 1)[-1]
+        for base, pattern, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + "/"):
+                    continue
+                local = rel_path[len(base) + 1:]
+            else:
+                local = rel_path
+            target = local if anchored else name
+            if fnmatch.fnmatchcase(target, pattern):
+                result = not negate
+        return result
+
+
+def walk_markdown(
+    directory: Path,
+    pattern: str,
+    ignore: tuple = DEFAULT_IGNORE,
+    max_depth: Optional[int] = None,
+    use_gitignore: bool = True,
+    gitignore: Optional[GitIgnore] = None,
+    directories: Optional[list] = None,
+) -> Iterator[Path]:
+    """
+    Yield files matching pattern under directory as they are found.
+
+    Directories are scanned depth-first with entries in name order, so
+    output is deterministic without collecting and sorting the whole tree
+    first. Pruned directories are never opened.
+
+    Args:
+        directory: Root of the walk
+        pattern: Glob matched against file names (e.g., "*_presentation.md")
+        ignore: Globs matched against names and root-relative paths of
+            files and directories to skip
+        max_depth: Deepest directory level to descend into (0 = root only,
+            None = unlimited)
+        use_gitignore: Honor .gitignore files found during the walk
+        gitignore: Collect .gitignore rules into this object instead of a
+            private one, so the caller can check later paths against them
+        directories: If given, every directory scanned is appended to it
+
+    Yields:
+        Paths of matching files
+    """
+    if not use_gitignore:
+        gitignore = None
+    elif gitignore is None:
+        gitignore = GitIgnore()
+    stack = [(directory, "", 0)]
+
+    while stack:
+        current, rel_dir, depth = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        if directories is not None:
+            directories.append(current)
+
+        if gitignore is not None and any(e.name == ".gitignore" for e in entries):
+            gitignore.add_file(current / ".gitignore", rel_dir)
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if any(
+                fnmatch.fnmatchcase(entry.name, g) or fnmatch.fnmatchcase(rel_path, g)
+                for g in ignore
+            ):
+                continue
+            if gitignore is not None and gitignore.ignored(rel_path, is_dir):
+                continue
+
+            if is_dir:
+                if max_depth is None or depth < max_depth:
+                    subdirs.append((Path(entry.path), rel_path, depth + 1))
+            elif fnmatch.fnmatch(entry.name, pattern):
+                yield Path(entry.path)
+
+        # Reverse so the stack pops subdirectories in name order
+        stack.extend(reversed(subdirs))
+
+
+def is_candidate(
+    directory: Path,
+    path: Path,
+    pattern: str,
+    ignore: tuple = DEFAULT_IGNORE,
+    max_depth: Optional[int] = None,
+    gitignore: Optional[GitIgnore] = None,
+) -> bool:
+    """
+    Check whether walk_markdown would yield path, without walking.
+
+    Applies the same rules to path and each of its parent directories
+    below directory. gitignore should hold the rules collected by a
+    walk of the same tree.
+    """
+    try:
+        parts = path.relative_to(directory).parts
+    except ValueError:
+        return False
+    if not parts or (max_depth is not None and len(parts) - 1 > max_depth):
+        return False
+    for i, name in enumerate(parts):
+        rel_path = "/".join(parts[:i + 1])
+        if any(
+            fnmatch.fnmatchcase(name, g) or fnmatch.fnmatchcase(rel_path, g)
+            for g in ignore
+        ):
+            return False
+        if gitignore is not None and gitignore.ignored(rel_path, i < len(parts) - 1):
+            return False
+    return fnmatch.fnmatch(parts[-1], pattern)
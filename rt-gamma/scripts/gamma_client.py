@@ -1,35 +1,215 @@
 """Gamma API client for generating presentations."""
-import sys
+import json
+import random
+import statistics
+import threading
+import time
+from pathlib import Path
 from typing import Optional
 
-# Auto-install requests if missing
-try:
-    import requests
-except ImportError:
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "requests", "-q"])
-    import requests
+import telemetry
+
+
+# Status codes worth retrying. Creation requests are not retried on a
+# plain 500, since the server may already have started the generation.
+# For the same reason they are retried after a dropped connection only
+# if it dropped while connecting, before anything was sent.
+RETRY_STATUS_READ = {429, 500, 502, 503, 504}
+RETRY_STATUS_CREATE = {429, 502, 503, 504}
+
+
+def generation_payload(
+    input_text: str,
+    text_mode: str = "preserve",
+    format_type: str = "presentation",
+    theme_id: Optional[str] = None,
+    num_cards: int = 10,
+    card_split: str = "inputTextBreaks",
+    image_source: str = "aiGenerated",
+) -> dict:
+    """Build the request body for POST /generations."""
+    payload = {
+        "inputText": input_text,
+        "textMode": text_mode,
+        "format": format_type,
+        "numCards": num_cards,
+        "cardSplit": card_split,
+        "imageOptions": {"source": image_source},
+    }
+
+    if theme_id:
+        payload["themeId"] = theme_id
+    return payload
+
+
+def template_payload(gamma_id: str, prompt: str, theme_id: Optional[str] = None) -> dict:
+    """Build the request body for POST /generations/from-template."""
+    payload = {
+        "gammaId": gamma_id,
+        "prompt": prompt,
+        "imageOptions": {"model": "flux-1-quick", "style": "match my theme"},
+    }
+
+    if theme_id:
+        payload["themeId"] = theme_id
+    return payload
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting requests per minute.
+
+    A rate of 0 disables limiting. `pause` blocks all callers for a while,
+    e.g. after the server answers 429 with a Retry-After hint.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 10.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, blocking until available. Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def make_session(pool_size: int) -> tuple:
+    """
+    Create the HTTP session used by GammaAPIClient.
+
+    Uses requests when it is installed, with the connection pool sized so
+    concurrent callers share keep-alive connections instead of opening
+    (and discarding) new ones. Otherwise falls back to the standard
+    library transport in stdlib_http. requests is imported here, on first
+    use, so commands that never reach the network do not pay for it.
+
+    Returns:
+        Tuple of (session, exception types treated as dropped connections,
+        predicate telling whether one of those dropped while connecting)
+    """
+    try:
+        import requests
+    except ImportError:
+        import stdlib_http
+        return (
+            stdlib_http.Session(pool_size),
+            stdlib_http.TRANSIENT_ERRORS,
+            lambda error: isinstance(error, stdlib_http.ConnectError),
+        )
+    from urllib3.exceptions import MaxRetryError
+
+    def is_connect_error(error: Exception) -> bool:
+        # With retries off, urllib3 reports only connect failures as
+        # MaxRetryError; errors after sending are raised as they are
+        return isinstance(error, requests.ConnectTimeout) or (
+            isinstance(error, requests.ConnectionError)
+            and bool(error.args)
+            and isinstance(error.args[0], MaxRetryError)
+        )
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session, (requests.ConnectionError, requests.Timeout), is_connect_error
 
 
 class GammaAPIClient:
-    """Client for the Gamma public API."""
+    """
+    Client for the Gamma public API.
 
-    def __init__(self, api_key: str, base_url: str = "https://public-api.gamma.app/v1.0"):
+    Creation and status/read endpoints are rate limited by separate token
+    buckets shared by every thread using the client. Requests answered
+    with 429 or a transient 5xx are retried with exponential backoff,
+    honoring Retry-After.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://public-api.gamma.app/v1.0",
+        pool_size: int = 10,
+        create_per_minute: float = 30,
+        status_per_minute: float = 120,
+        max_retries: int = 4,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+    ):
         self.api_key = api_key
         self.base_url = base_url
-        self.session = requests.Session()
+        self.create_bucket = TokenBucket(create_per_minute)
+        self.status_bucket = TokenBucket(status_per_minute)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session, self._transient_errors, self._is_connect_error = make_session(pool_size)
         self.session.headers.update({
             "X-API-KEY": api_key,
             "Content-Type": "application/json",
         })
 
+    @classmethod
+    def from_config(cls, config: dict, **kwargs) -> "GammaAPIClient":
+        """Create a client using the API key, endpoint and rate limits from config."""
+        if config.get("api_base_url"):
+            kwargs.setdefault("base_url", config["api_base_url"].rstrip("/"))
+        return cls(
+            config["api_key"],
+            create_per_minute=float(config.get("rate_limit_create", 30)),
+            status_per_minute=float(config.get("rate_limit_status", 120)),
+            max_retries=int(config.get("max_retries", 4)),
+            **kwargs,
+        )
+
     def list_themes(self) -> list[dict]:
         """Fetch all available themes in the workspace."""
+        themes, _ = self.fetch_themes()
+        return themes
+
+    def fetch_themes(self, etag: Optional[str] = None) -> tuple[Optional[list], Optional[str]]:
+        """
+        Fetch themes, conditionally on a previously returned ETag.
+
+        Returns:
+            Tuple of (themes, etag); themes is None if the server answered
+            304 Not Modified for the given etag
+        """
         url = f"{self.base_url}/themes"
-        response = self.session.get(url)
-        response.raise_for_status()
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self._request(
+            "GET", url, self.status_bucket, RETRY_STATUS_READ, headers=headers
+        )
+        if response.status_code == 304:
+            return None, etag
         data = response.json()
-        return data.get("data", data) if isinstance(data, dict) else data
+        themes = data.get("data", data) if isinstance(data, dict) else data
+        return themes, response.headers.get("ETag")
 
     def generate_presentation(
         self,
@@ -56,21 +236,13 @@ class GammaAPIClient:
         Returns:
             API response with generation details including generationId
         """
-        payload = {
-            "inputText": input_text,
-            "textMode": text_mode,
-            "format": format_type,
-            "numCards": num_cards,
-            "cardSplit": card_split,
-            "imageOptions": {"source": image_source},
-        }
-
-        if theme_id:
-            payload["themeId"] = theme_id
-
+        payload = generation_payload(
+            input_text, text_mode, format_type, theme_id, num_cards, card_split, image_source
+        )
         url = f"{self.base_url}/generations"
-        response = self.session.post(url, json=payload)
-        response.raise_for_status()
+        response = self._request(
+            "POST", url, self.create_bucket, RETRY_STATUS_CREATE, json=payload
+        )
         return response.json()
 
     def create_from_template(
@@ -90,23 +262,196 @@ class GammaAPIClient:
         Returns:
             API response with generation details
         """
-        payload = {
-            "gammaId": gamma_id,
-            "prompt": prompt,
-            "imageOptions": {"model": "flux-1-quick", "style": "match my theme"},
-        }
-
-        if theme_id:
-            payload["themeId"] = theme_id
-
+        payload = template_payload(gamma_id, prompt, theme_id)
         url = f"{self.base_url}/generations/from-template"
-        response = self.session.post(url, json=payload)
-        response.raise_for_status()
+        response = self._request(
+            "POST", url, self.create_bucket, RETRY_STATUS_CREATE, json=payload
+        )
         return response.json()
 
     def get_generation_status(self, generation_id: str) -> dict:
         """Check the status of a generation and get URLs if ready."""
+        return self.poll_generation_status(generation_id)[0]
+
+    def poll_generation_status(self, generation_id: str) -> tuple[dict, Optional[float]]:
+        """
+        Check the status of a generation, including the server's polling hint.
+
+        Returns:
+            Tuple of (status dict, seconds from the Retry-After header or None)
+        """
         url = f"{self.base_url}/generations/{generation_id}"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        telemetry.count("status_polls")
+        response = self._request("GET", url, self.status_bucket, RETRY_STATUS_READ)
+        return response.json(), parse_retry_after(response.headers.get("Retry-After"))
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        bucket: TokenBucket,
+        retry_status: set,
+        **kwargs,
+    ):
+        """
+        Send a rate-limited request, retrying 429/5xx and connection errors.
+
+        POST creates a generation, so it is only retried after a
+        connection error that happened before the request was sent; a
+        timeout waiting for the response is raised, as the generation may
+        already be running.
+
+        Raises the session's HTTPError (requests.HTTPError or
+        stdlib_http.HTTPError) once retries are exhausted or for
+        non-retryable errors.
+        """
+        attempt = 0
+        while True:
+            waited = bucket.acquire()
+            if waited:
+                telemetry.count("rate_limit_wait_s", waited)
+            telemetry.count("requests")
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except self._transient_errors as e:
+                if attempt >= self.max_retries:
+                    raise
+                if method == "POST" and not self._is_connect_error(e):
+                    raise
+                response = None
+            else:
+                telemetry.count("bytes_sent", len(response.request.body or b""))
+
+            if response is not None and response.status_code not in retry_status:
+                response.raise_for_status()
+                return response
+            if attempt >= self.max_retries:
+                response.raise_for_status()
+
+            delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+            if response is not None:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if response.status_code == 429:
+                    # Slow down every thread sharing this bucket, not just this one
+                    bucket.pause(delay)
+            telemetry.count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PollStrategy:
+    """
+    Adaptive wait strategy for polling generation status.
+
+    Polls start fast and back off exponentially (with jitter) up to
+    max_delay. A Retry-After hint from the server is always honored.
+    Completion times of recent generations are remembered in a small
+    JSON history file so the first poll can be scheduled near the
+    typical completion time instead of polling an idle job repeatedly.
+    """
+
+    def __init__(
+        self,
+        history_path: Optional[Path] = None,
+        initial: float = 1.0,
+        factor: float = 1.6,
+        max_delay: float = 15.0,
+        jitter: float = 0.2,
+        history_size: int = 20,
+    ):
+        self.history_path = history_path
+        self.initial = initial
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._history = self._load_history()
+
+    def _load_history(self) -> list[float]:
+        if self.history_path is None or not self.history_path.exists():
+            return []
+        try:
+            data = json.loads(self.history_path.read_text(encoding="utf-8"))
+            return [float(d) for d in data.get("durations", [])][-self.history_size:]
+        except (OSError, ValueError, TypeError, AttributeError):
+            return []
+
+    def typical_duration(self) -> Optional[float]:
+        """Median completion time of recent generations, if known."""
+        with self._lock:
+            return statistics.median(self._history) if self._history else None
+
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def first_delay(self) -> float:
+        """Delay before the first status check after submission."""
+        typical = self.typical_duration()
+        if typical is None:
+            return self._jittered(self.initial)
+        # Aim slightly before the typical finish so fast runs aren't delayed
+        return self._jittered(max(self.initial, typical * 0.75))
+
+    def next_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before the next status check.
+
+        Args:
+            attempt: Number of status checks already made for this generation
+            retry_after: Server hint from the Retry-After header, if any
+        """
+        delay = min(self.max_delay, self.initial * (self.factor ** max(0, attempt - 1)))
+        delay = self._jittered(delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def expected_polls(self, duration: float) -> int:
+        """
+        Status checks a generation taking duration seconds would need.
+
+        Follows first_delay/next_delay without jitter; used for estimates.
+        """
+        typical = self.typical_duration()
+        elapsed = self.initial if typical is None else max(self.initial, typical * 0.75)
+        polls = 1
+        while elapsed < duration:
+            elapsed += min(self.max_delay, self.initial * (self.factor ** (polls - 1)))
+            polls += 1
+        return polls
+
+    def record(self, duration: float) -> None:
+        """Remember how long a completed generation took."""
+        with self._lock:
+            self._history.append(round(duration, 2))
+            self._history = self._history[-self.history_size:]
+            history = list(self._history)
+
+        if self.history_path is None:
+            return
+        try:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            self.history_path.write_text(
+                json.dumps({"durations": history}), encoding="utf-8"
+            )
+        except OSError:
+            pass
@@ -1,25 +1,97 @@
 #!/usr/bin/env python3
 """Generate a single Gamma presentation from a markdown file."""
+import argparse
 import json
 import sys
 import time
 from pathlib import Path
+from typing import Optional
 
-from config import load_config, config_exists, get_config_path
-from gamma_client import GammaAPIClient
-from markdown_utils import extract_title, read_markdown_file, prepare_content
+from batch import deck_output_path, generation_request, write_redirect
+from cache import ResultCache, content_key
+from config import (
+    load_config,
+    config_exists,
+    daemon_enabled,
+    get_cache_path,
+    get_config_path,
+    get_timings_path,
+)
+from gamma_client import GammaAPIClient, PollStrategy
+from markdown_utils import (
+    MAX_CARDS,
+    MAX_INPUT_TOKENS,
+    extract_title,
+    plan_decks,
+    prepare_content,
+    read_markdown_file,
+)
+from output import open_results_index
+from poller import StatusPoller
+from telemetry import FileTrace, TraceWriter, span, tracing
+from themes import normalize_name, resolve_theme_id
 
+# Output formats accepted by the generations API
+FORMATS = ("presentation", "document", "social", "webpage")
 
-def generate_presentation(file_path: str) -> dict:
+
+def generate_presentation(
+    file_path: str,
+    use_cache: bool = True,
+    trace_path: Optional[str] = None,
+    client: Optional[GammaAPIClient] = None,
+    poller: Optional[StatusPoller] = None,
+    formats: Optional[list[str]] = None,
+    themes: Optional[list[str]] = None,
+) -> dict:
     """
     Generate a presentation from a markdown file.
 
+    With formats and/or themes, the file is prepared once and every
+    format x theme variant is submitted at once, each written to its own
+    redirect (talk.presentation.html, talk.document.html, ...).
+
     Args:
         file_path: Path to the markdown file
+        use_cache: Reuse a cached URL for identical content and config
+        trace_path: Also append the timing record to this JSONL file
+        client: Existing API client to reuse (the daemon's warm client);
+            a new one is created from config if omitted
+        poller: Existing status poller for client; a private one is
+            used if omitted
+        formats: Formats to generate (see FORMATS)
+        themes: Theme ids or names to generate each format in
 
     Returns:
-        dict with success, url, html_path, and optionally error
+        dict with success, url, html_path, timing, and optionally error;
+        with formats or themes, a variants list of those per variant
     """
+    trace = FileTrace(str(Path(file_path).resolve()))
+    with tracing(trace):
+        result = _generate_presentation(
+            file_path, use_cache, trace, client, poller, formats, themes
+        )
+    result["timing"] = trace.to_dict()
+
+    if trace_path:
+        TraceWriter(Path(trace_path)).write({
+            "type": "file",
+            "path": trace.path,
+            "success": result.get("success", False),
+            **result["timing"],
+        })
+    return result
+
+
+def _generate_presentation(
+    file_path: str,
+    use_cache: bool,
+    trace: FileTrace,
+    client: Optional[GammaAPIClient],
+    poller: Optional[StatusPoller],
+    formats: Optional[list[str]] = None,
+    themes: Optional[list[str]] = None,
+) -> dict:
     path = Path(file_path).resolve()
 
     # Load config
@@ -33,7 +105,15 @@ def generate_presentation(file_path: str) -> dict:
     except ValueError as e:
         return {"success": False, "error": str(e)}
 
+    # Variants to generate; themes may be given by name and are resolved
+    # from the local catalog
+    try:
+        variants = plan_variants(config, formats, themes)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
     # Read markdown
+    read_started = time.monotonic()
     try:
         content = read_markdown_file(str(path))
     except (FileNotFoundError, ValueError) as e:
@@ -47,97 +127,277 @@ def generate_presentation(file_path: str) -> dict:
     # Prepare content
     final_content = prepare_content(content, title)
 
-    # Create client
-    client = GammaAPIClient(config["api_key"])
-
-    # Map config image_source to API value
-    image_source_map = {
-        "ai": "aiGenerated",
-        "unsplash": "unsplash",
-        "giphy": "giphy",
-        "pexels": "webFreeToUse",
-        "pictographic": "pictographic",
-        "none": "noImages",
-    }
-    image_source = image_source_map.get(config.get("image_source", "ai"), "aiGenerated")
-
+    # Plan decks locally: numCards follows the --- breaks, and content too
+    # large for one generation is split before anything is sent
     try:
-        # Check if using template
-        template_id = config.get("template", "").strip()
-        theme_id = config.get("theme", "").strip() or None
-
-        if template_id:
-            # Template-based generation
-            result = client.create_from_template(
-                gamma_id=template_id,
-                prompt=final_content,
-                theme_id=theme_id,
-            )
+        decks = plan_decks(
+            final_content,
+            title,
+            card_split=config.get("card_split", "inputTextBreaks"),
+            max_tokens=int(config.get("max_input_tokens", MAX_INPUT_TOKENS)),
+            max_cards=int(config.get("max_cards", MAX_CARDS)),
+        )
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    # Reuse URLs if this exact content and config was generated before.
+    # Every variant shares the prepared content and deck plan; only the
+    # format/theme in its config (and so its cache keys) differ.
+    cache = ResultCache(
+        get_cache_path(),
+        max_entries=config.get("cache_max_entries", 1000),
+        max_age_days=config.get("cache_max_age_days", 90),
+    )
+    for variant in variants:
+        variant_config = variant["config"]
+        variant["key"] = content_key(final_content, variant_config)
+        if len(decks) == 1:
+            variant["keys"] = [variant["key"]]
         else:
-            # Standard generation
-            result = client.generate_presentation(
-                input_text=final_content,
-                text_mode=config.get("text_mode", "preserve"),
-                format_type="presentation",
-                theme_id=theme_id,
-                card_split=config.get("card_split", "inputTextBreaks"),
-                image_source=image_source,
-            )
+            variant["keys"] = [content_key(deck["content"], variant_config) for deck in decks]
+        variant["urls"] = [cache.get(k) if use_cache else None for k in variant["keys"]]
+        variant["cached"] = all(variant["urls"])
+        variant["error"] = None
+    trace.add_phase("read", time.monotonic() - read_started)
 
-        generation_id = result.get("generationId")
-        if not generation_id:
-            return {
-                "success": False,
-                "error": "No generation ID returned from API"
-            }
-
-        # Poll for completion (max 2 minutes)
-        max_attempts = 60
-        for _ in range(max_attempts):
-            time.sleep(2)
-            status = client.get_generation_status(generation_id)
-
-            if status.get("status") == "completed":
-                gamma_url = status.get("gammaUrl", status.get("url"))
-
-                # Create HTML redirect file
-                html_path = path.with_suffix(".html")
-                html_content = f'''<!DOCTYPE html>
-<html>
-<head><meta http-equiv="refresh" content="0;url={gamma_url}"></head>
-</html>'''
-                html_path.write_text(html_content, encoding="utf-8")
-
-                return {
-                    "success": True,
-                    "url": gamma_url,
-                    "html_path": str(html_path),
-                    "title": title,
-                }
-
-            elif status.get("status") == "failed":
-                return {
-                    "success": False,
-                    "error": status.get("error", "Generation failed")
-                }
+    try:
+        generation_ids = {}
+        if not all(v["cached"] for v in variants):
+            # Create client
+            if client is None:
+                client = GammaAPIClient.from_config(config)
 
-        return {
-            "success": False,
-            "error": "Timeout: Generation took longer than 2 minutes"
+            # Submit every deck of every variant before waiting, so Gamma
+            # works on all of them in parallel. A failed submission only
+            # fails its variant: whatever was already submitted is still
+            # waited for, cached and written.
+            with span("submit"):
+                for v_index, variant in enumerate(variants):
+                    for index, deck in enumerate(decks):
+                        if variant["urls"][index] is not None:
+                            continue
+                        try:
+                            method, kwargs = generation_request(
+                                deck["content"], variant["config"], deck["num_cards"]
+                            )
+                            result = getattr(client, method)(**kwargs)
+                            generation_id = result.get("generationId")
+                            error = None if generation_id else "No generation ID returned from API"
+                        except Exception as e:
+                            error = str(e)
+                        if error is not None:
+                            if len(decks) > 1:
+                                error = f"Part {index + 1} of {len(decks)}: {error}"
+                            variant["error"] = error
+                            break
+                        generation_ids[(v_index, index)] = generation_id
+
+            # Wait for completion (max 2 minutes each). All generations are
+            # polled together, so this takes about as long as the slowest.
+            own_poller = poller is None
+            if own_poller:
+                poller = StatusPoller(client, PollStrategy(get_timings_path()))
+            try:
+                with span("queue"):
+                    statuses = poller.wait_all(list(generation_ids.values()))
+                    for (v_index, index), status in zip(generation_ids, statuses):
+                        variant = variants[v_index]
+                        if status.get("status") != "completed":
+                            if variant["error"] is None:
+                                error = status.get("error", "Generation failed")
+                                if len(decks) > 1:
+                                    error = f"Part {index + 1} of {len(decks)}: {error}"
+                                variant["error"] = error
+                            continue
+                        url = status.get("gammaUrl", status.get("url"))
+                        variant["urls"][index] = url
+                        # Cached even if another part of the variant failed,
+                        # so a rerun only regenerates what is missing
+                        cache.put(variant["keys"][index], url)
+            finally:
+                if own_poller:
+                    poller.close()
+
+        # Create HTML redirect files for every variant that finished
+        with span("write"):
+            results_index = open_results_index(config)
+            for variant in variants:
+                if variant["error"] is not None:
+                    continue
+                urls = variant["urls"]
+                variant["html_paths"] = [
+                    write_redirect(
+                        path, url, deck_output_path(path, index, len(urls), variant["label"])
+                    )
+                    for index, url in enumerate(urls, 1)
+                ]
+                if results_index is not None:
+                    results_index.record(path, [
+                        {"url": url, "html_path": html_path}
+                        for url, html_path in zip(urls, variant["html_paths"])
+                    ], variant["label"])
+
+            # Batch mode tracks staleness of the plain talk.html only
+            if variants[0]["label"] == "" and variants[0]["error"] is None:
+                cache.record_source(path, variants[0]["key"])
+            cache.save()
+            if results_index is not None:
+                results_index.close()
+
+        if len(variants) == 1 and variants[0]["label"] == "":
+            variant = variants[0]
+            if variant["error"] is not None:
+                return {"success": False, "error": variant["error"]}
+            return _variant_result(variant, title)
+
+        failed = [v for v in variants if v["error"] is not None]
+        result = {
+            "success": not failed,
+            "title": title,
+            "cached": all(v["cached"] for v in variants),
+            "variants": [
+                {"format": v["format"], "theme": v["theme"], "success": False, "error": v["error"]}
+                if v["error"] is not None else
+                {"format": v["format"], "theme": v["theme"], **_variant_result(v)}
+                for v in variants
+            ],
         }
+        if failed:
+            result["error"] = f"{len(failed)} of {len(variants)} variants failed"
+        return result
 
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+def _variant_result(variant: dict, title: Optional[str] = None) -> dict:
+    urls = variant["urls"]
+    html_paths = variant["html_paths"]
+    result = {
+        "success": True,
+        "url": urls[0],
+        "html_path": str(html_paths[0]),
+        "cached": variant["cached"],
+    }
+    if title is not None:
+        result["title"] = title
+    if len(urls) > 1:
+        result["parts"] = [
+            {"url": url, "html_path": str(p)} for url, p in zip(urls, html_paths)
+        ]
+    return result
+
+
+def plan_variants(
+    config: dict,
+    formats: Optional[list[str]] = None,
+    themes: Optional[list[str]] = None,
+) -> list[dict]:
+    """
+    Expand formats x themes into the variants to generate.
+
+    Without formats or themes there is one variant, the configured theme
+    as a presentation, written to talk.html as usual. Otherwise each
+    variant gets a label used in its output names: the format
+    (talk.document.html), plus the theme when themes are given
+    (talk.document.night-sky.html).
+
+    Returns:
+        List of dicts with format, theme, label and the variant's config
+
+    Raises:
+        ValueError: If a format is unknown, or formats other than
+            presentation are combined with a template
+    """
+    fan_out = bool(formats) or bool(themes)
+    formats = list(dict.fromkeys(formats or ["presentation"]))
+    for format_type in formats:
+        if format_type not in FORMATS:
+            raise ValueError(
+                f"Unknown format '{format_type}'. Choose from: {', '.join(FORMATS)}"
+            )
+    if config.get("template", "").strip() and formats != ["presentation"]:
+        raise ValueError("Templates set their own format; use --formats only without a template")
+
+    theme_names = list(dict.fromkeys(themes or [str(config.get("theme", ""))]))
+    theme_ids = {
+        name: resolve_theme_id({**config, "theme": name}) or "" for name in theme_names
+    }
+
+    variants = []
+    for format_type in formats:
+        for name in theme_names:
+            label = ""
+            if fan_out:
+                label = format_type
+                if themes:
+                    label += "." + (normalize_name(name).replace(" ", "-") or "default")
+            variants.append({
+                "format": format_type,
+                "theme": name,
+                "label": label,
+                "config": {**config, "format": format_type, "theme": theme_ids[name]},
+            })
+    return variants
+
+
+def _split_list(value: str) -> list[str]:
+    """Split a comma-separated CLI value, dropping blanks."""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
 def main():
     """CLI entry point."""
-    if len(sys.argv) < 2:
-        print(json.dumps({"success": False, "error": "Usage: generate.py <markdown_file>"}))
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("file_path", nargs="?")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--trace", default=None)
+    parser.add_argument("--daemon", action="store_true")
+    parser.add_argument("--no-wait", action="store_true")
+    parser.add_argument("--progress", action="store_true")
+    parser.add_argument("--formats", default=None)
+    parser.add_argument("--themes", default=None)
+    args, unknown = parser.parse_known_args()
+
+    if not args.file_path or unknown:
+        print(json.dumps({
+            "success": False,
+            "error": "Usage: generate.py <markdown_file> [--no-cache] [--trace FILE] "
+                     "[--formats LIST|all] [--themes LIST] [--daemon [--no-wait] [--progress]]"
+        }))
         sys.exit(1)
 
-    file_path = sys.argv[1]
-    result = generate_presentation(file_path)
+    formats = themes = None
+    if args.formats:
+        formats = list(FORMATS) if args.formats == "all" else _split_list(args.formats)
+    if args.themes:
+        themes = _split_list(args.themes)
+
+    result = None
+    if daemon_enabled(args.daemon):
+        # Hand the job to the warm daemon; None means run it here instead
+        from daemon import run_job
+        result = run_job(
+            {
+                "op": "generate",
+                "path": str(Path(args.file_path).resolve()),
+                "use_cache": not args.no_cache,
+                "trace": str(Path(args.trace).resolve()) if args.trace else None,
+                "formats": formats,
+                "themes": themes,
+                "wait": not args.no_wait,
+                "progress": args.progress,
+            },
+            on_event=lambda event: print(json.dumps(event), flush=True),
+        )
+    if result is None:
+        result = generate_presentation(
+            args.file_path,
+            use_cache=not args.no_cache,
+            trace_path=args.trace,
+            formats=formats,
+            themes=themes,
+        )
 
     print(json.dumps(result))
     sys.exit(0 if result.get("success") else 1)
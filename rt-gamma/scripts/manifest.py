@@ -0,0 +1,139 @@
+"""Append-only manifest of batch generations for crash-safe resume."""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Events after which a generation needs no further work
+TERMINAL_EVENTS = ("completed", "failed")
+
+
+class BatchManifest:
+    """
+    Record each file's submission, generationId, status transitions and
+    final URL as JSON lines in an append-only file.
+
+    Every event is flushed and fsynced before returning, so after a crash
+    the manifest shows exactly which generations were submitted and not
+    yet finished. The next run reattaches to those generationIds instead
+    of paying for a second submission.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, TypeError, KeyError):
+                        # Ignore a line truncated by a crash mid-write
+                        continue
+        except OSError:
+            pass
+
+    def _apply(self, record: dict) -> None:
+        path = record["path"]
+        event = record["event"]
+        if event == "submitted":
+            self._state[path] = {
+                "path": path,
+                "key": record.get("key"),
+                "generation_id": record.get("generation_id"),
+                "status": "submitted",
+            }
+            return
+
+        state = self._state.get(path)
+        if state is None:
+            return
+        state["status"] = record.get("status", event)
+        if event == "completed":
+            state["url"] = record.get("url")
+        elif event == "failed":
+            state["error"] = record.get("error")
+
+    def record(self, path: Path, event: str, **fields) -> None:
+        """
+        Append an event for a file and apply it to the in-memory state.
+
+        Args:
+            path: Source markdown file
+            event: 'submitted', 'status', 'completed' or 'failed'
+            **fields: Event data (key, generation_id, status, url, error)
+        """
+        record = {"ts": round(time.time(), 3), "path": str(path), "event": event, **fields}
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._apply(record)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def resume_state(self, path: Path, key: str) -> Optional[dict]:
+        """
+        Return the recorded state for a file if it can be resumed.
+
+        Only state for the same content key is returned: a generation
+        submitted for an older version of the file is never reused.
+        A returned state either has status 'completed' with a url, or is
+        still in flight with a generation_id to reattach to.
+        """
+        with self._lock:
+            state = self._state.get(str(path))
+            if state is None or state.get("key") != key:
+                return None
+            if state["status"] == "failed":
+                return None
+            if state["status"] == "completed" and not state.get("url"):
+                return None
+            return dict(state)
+
+    def in_flight(self) -> list[dict]:
+        """States of all generations submitted but not yet finished."""
+        with self._lock:
+            return [
+                dict(s) for s in self._state.values()
+                if s["status"] not in TERMINAL_EVENTS
+            ]
+
+    def compact(self) -> None:
+        """Rewrite the manifest keeping only generations still in flight."""
+        with self._lock:
+            pending = [
+                s for s in self._state.values()
+                if s["status"] not in TERMINAL_EVENTS
+            ]
+            if not pending and not self.path.exists():
+                return
+            lines = "".join(
+                json.dumps({
+                    "ts": round(time.time(), 3),
+                    "path": s["path"],
+                    "event": "submitted",
+                    "key": s.get("key"),
+                    "generation_id": s.get("generation_id"),
+                }) + "\n"
+                for s in pending
+            )
+            self._state = {s["path"]: s for s in pending}
+            try:
+                if not pending:
+                    self.path.unlink()
+                    return
+                tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(lines, encoding="utf-8")
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
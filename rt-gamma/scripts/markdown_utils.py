@@ -1,7 +1,115 @@
 """Markdown parsing utilities for extracting content and titles."""
+import io
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+_FENCE_RE = re.compile(r'^\s*(```|~~~)')
+_FRONTMATTER_FENCE_RE = re.compile(r'^---\s*$')
+_FRONTMATTER_END_RE = re.compile(r'^(---|\.\.\.)\s*$')
+_FRONTMATTER_FIELD_RE = re.compile(r'^([A-Za-z_][\w-]*)\s*:\s*(.*?)\s*$')
+_H1_RE = re.compile(r'^#\s+(.+?)\s*$')
+_BOOLEANS = {"true": True, "yes": True, "false": False, "no": False}
+# Fields that are always text, even when they look like a bool or number
+_STRING_FIELDS = {"title"}
+
+
+def _frontmatter_value(raw: str, key: str = ""):
+    """Parse a scalar frontmatter value: quoted or bare string, bool, or number."""
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in "\"'":
+        return raw[1:-1]
+    if key in _STRING_FIELDS:
+        return raw
+    lowered = raw.lower()
+    if lowered in _BOOLEANS:
+        return _BOOLEANS[lowered]
+    try:
+        return int(raw)
+    except ValueError:
+        pass
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def parse_header(lines: Iterable[str], want_title: bool = True) -> dict:
+    """
+    Parse frontmatter and title from markdown lines in a single pass.
+
+    Consumes lines only until the title is settled: the end of the
+    frontmatter if it has a title, otherwise the first H1 heading.
+    Frontmatter is read as flat `key: value` pairs (nested YAML is
+    ignored). H1 lines inside fenced code blocks are not titles.
+
+    Args:
+        lines: Markdown lines, with or without line endings
+        want_title: If False, stop after the frontmatter; the title is
+            then only taken from frontmatter
+
+    Returns:
+        dict with frontmatter (dict) and title (str or None), using the
+        same precedence as extract_title
+    """
+    frontmatter = {}
+    fallback = None
+    fallback_done = False
+    fence = None
+
+    it = iter(lines)
+    first = next(it, None)
+    if first is not None and _FRONTMATTER_FENCE_RE.match(first):
+        seen = []
+        for line in it:
+            if _FRONTMATTER_END_RE.match(line):
+                break
+            seen.append(line)
+            match = _FRONTMATTER_FIELD_RE.match(line)
+            if match:
+                key = match.group(1)
+                frontmatter[key] = _frontmatter_value(match.group(2), key)
+        else:
+            # Unterminated: not frontmatter after all, scan it as body
+            frontmatter = {}
+            it = iter(seen)
+        title = frontmatter.get("title")
+        if isinstance(title, str) and title.strip():
+            return {"frontmatter": frontmatter, "title": title.strip()}
+        remaining = it
+    else:
+        remaining = [] if first is None else _chain(first, it)
+
+    if not want_title:
+        return {"frontmatter": frontmatter, "title": None}
+
+    for line in remaining:
+        fence_match = _FENCE_RE.match(line)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker == fence:
+                fence = None
+            continue
+        if fence is not None:
+            continue
+        match = _H1_RE.match(line)
+        if match:
+            return {"frontmatter": frontmatter, "title": match.group(1)}
+        if not fallback_done:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('---'):
+                # If it's short and doesn't look like a paragraph, treat as title
+                if len(stripped) < 100 and not stripped.endswith('.'):
+                    fallback = stripped
+                fallback_done = True
+
+    return {"frontmatter": frontmatter, "title": fallback}
+
+
+def _chain(first: str, rest: Iterator[str]) -> Iterator[str]:
+    yield first
+    yield from rest
 
 
 def extract_title(content: str) -> Optional[str]:
@@ -15,30 +123,25 @@ def extract_title(content: str) -> Optional[str]:
 
     Returns None if no clear title is found.
     """
-    # Check for YAML frontmatter
-    frontmatter_match = re.match(r'^---\s*\n(.*?)\n---', content, re.DOTALL)
-    if frontmatter_match:
-        frontmatter = frontmatter_match.group(1)
-        title_match = re.search(r'^title:\s*["\']?(.+?)["\']?\s*$', frontmatter, re.MULTILINE)
-        if title_match:
-            return title_match.group(1).strip()
-
-    # Check for H1 heading
-    h1_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-    if h1_match:
-        return h1_match.group(1).strip()
-
-    # Check first non-empty line (if it looks like a title)
-    lines = content.strip().split('\n')
-    for line in lines:
-        line = line.strip()
-        if line and not line.startswith('---'):
-            # If it's short and doesn't look like a paragraph, treat as title
-            if len(line) < 100 and not line.endswith('.'):
-                return line
-            break
+    return parse_header(io.StringIO(content))["title"]
 
-    return None
+
+def read_header(file_path: str, want_title: bool = True) -> dict:
+    """
+    Read only the frontmatter and title of a markdown file.
+
+    The file is streamed line by line and closed as soon as the title is
+    known (or right after the frontmatter if want_title is False), so
+    large bodies are never loaded.
+
+    Returns:
+        dict with frontmatter and title, as from parse_header
+
+    Raises:
+        OSError, UnicodeDecodeError: If the file cannot be read
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        return parse_header(f, want_title)
 
 
 def read_markdown_file(file_path: str) -> str:
@@ -67,3 +170,172 @@ def prepare_content(content: str, title: Optional[str] = None) -> str:
             content = f"# {title}\n\n{content}"
 
     return content
+
+
+# Gamma accepts up to 100k tokens of inputText per generation
+MAX_INPUT_TOKENS = 100_000
+# Card limit on Pro plans (Ultra allows 75)
+MAX_CARDS = 60
+# numCards when Gamma picks the split itself and the text has no breaks
+DEFAULT_NUM_CARDS = 10
+# Rough characters per token for English markdown
+CHARS_PER_TOKEN = 4
+
+_CARD_BREAK_RE = re.compile(r'^\s*---\s*$')
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text (about 4 characters per token)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def strip_frontmatter(content: str) -> str:
+    """
+    Remove a YAML frontmatter block from the start of content.
+
+    The block may follow a leading H1, since prepare_content puts the
+    title above the frontmatter. After an H1 the block is only removed
+    if every line in it is a `key: value` field, an indented or list
+    line, or blank, so a short first card between `---` breaks is kept.
+    """
+    lines = content.split('\n')
+    start = 0
+    if lines and _H1_RE.match(lines[0]):
+        start = 1
+        while start < len(lines) and not lines[start].strip():
+            start += 1
+    if start >= len(lines) or not _FRONTMATTER_FENCE_RE.match(lines[start]):
+        return content
+
+    for end in range(start + 1, len(lines)):
+        if _FRONTMATTER_END_RE.match(lines[end]):
+            break
+    else:
+        return content
+    body = lines[start + 1:end]
+    if start > 0 and not (
+        any(_FRONTMATTER_FIELD_RE.match(line) for line in body)
+        and all(
+            not line.strip()
+            or line[0] in ' \t-#'
+            or _FRONTMATTER_FIELD_RE.match(line)
+            for line in body
+        )
+    ):
+        return content
+    return '\n'.join(lines[:start] + lines[end + 1:])
+
+
+def split_cards(content: str) -> list[str]:
+    """
+    Split content into cards at `---` lines.
+
+    Break markers inside fenced code blocks are ignored, and so is a
+    leading YAML frontmatter block (see strip_frontmatter), which is not
+    a card. Cards are returned without the markers and with surrounding
+    blank lines stripped; empty cards are dropped.
+    """
+    cards = []
+    current = []
+    fence = None
+    for line in strip_frontmatter(content).split('\n'):
+        fence_match = _FENCE_RE.match(line)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker == fence:
+                fence = None
+        if fence is None and _CARD_BREAK_RE.match(line):
+            cards.append('\n'.join(current))
+            current = []
+        else:
+            current.append(line)
+    cards.append('\n'.join(current))
+    return [card.strip('\n') for card in cards if card.strip()]
+
+
+def plan_decks(
+    content: str,
+    title: Optional[str] = None,
+    card_split: str = "inputTextBreaks",
+    max_tokens: int = MAX_INPUT_TOKENS,
+    max_cards: int = MAX_CARDS,
+) -> list[dict]:
+    """
+    Plan how prepared content is submitted, before any API call.
+
+    Content that fits in one generation becomes a single deck. Larger
+    content is split at card breaks into several decks, each within
+    max_tokens and max_cards; decks after the first open with a title
+    card ("Title (2/3)") so they stand on their own.
+
+    Args:
+        content: Output of prepare_content
+        title: Title used for continuation decks
+        card_split: Config card_split; numCards follows the `---` breaks
+            for 'inputTextBreaks', and is only a hint for 'auto'
+        max_tokens: Estimated token budget per deck
+        max_cards: Card budget per deck
+
+    Returns:
+        List of dicts with content, num_cards and tokens, one per deck
+
+    Raises:
+        ValueError: If a single card is larger than max_tokens
+    """
+    cards = split_cards(content)
+    tokens = estimate_tokens(content)
+
+    if tokens <= max_tokens and len(cards) <= max_cards:
+        return [{
+            "content": content,
+            "num_cards": _num_cards(len(cards), card_split, max_cards),
+            "tokens": tokens,
+        }]
+
+    for index, card in enumerate(cards, 1):
+        card_tokens = estimate_tokens(card)
+        if card_tokens > max_tokens:
+            raise ValueError(
+                f"Card {index} is about {card_tokens:,} tokens; a single deck "
+                f"accepts at most {max_tokens:,}. Add --- breaks to split it."
+            )
+
+    # Groups after the first leave room for their continuation title card
+    title_tokens = estimate_tokens(f"# {title} (99/99)") + 2 if title else 0
+    groups = []
+    current = []
+    current_tokens = 0
+    for card in cards:
+        card_tokens = estimate_tokens(card) + 2
+        reserve_tokens = title_tokens if groups else 0
+        reserve_cards = 1 if groups and title else 0
+        if current and (
+            current_tokens + card_tokens > max(0, max_tokens - reserve_tokens)
+            or len(current) + 1 > max(1, max_cards - reserve_cards)
+        ):
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(card)
+        current_tokens += card_tokens
+    groups.append(current)
+
+    decks = []
+    for index, group in enumerate(groups, 1):
+        if index > 1 and title:
+            group = [f"# {title} ({index}/{len(groups)})"] + group
+        deck_content = '\n\n---\n\n'.join(group)
+        decks.append({
+            "content": deck_content,
+            "num_cards": _num_cards(len(group), card_split, max_cards),
+            "tokens": estimate_tokens(deck_content),
+        })
+    return decks
+
+
+def _num_cards(count: int, card_split: str, max_cards: int) -> int:
+    if card_split != "inputTextBreaks" and count <= 1:
+        return DEFAULT_NUM_CARDS
+    return max(1, min(count, max_cards))
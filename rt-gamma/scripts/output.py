@@ -0,0 +1,232 @@
+"""
+Output stage: crash-safe redirect files and a results index for a tree.
+
+Redirects are written to a temporary file and renamed into place, so an
+interrupted run never leaves a truncated .html that looks finished. The
+results index lists every generated deck (source, part, URL, redirect
+path) in one JSON or CSV file that is rewritten atomically as results
+arrive, so downstream tools never need to glob the tree.
+"""
+import csv
+import io
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import get_results_index_path
+
+# Seconds between index rewrites while results are arriving
+FLUSH_INTERVAL = 2.0
+
+INDEX_FIELDS = ("source", "variant", "part", "parts", "url", "html_path", "updated")
+
+REDIRECT_URL_RE = re.compile(r'http-equiv="refresh" content="0;url=([^"]+)"')
+
+_PART_RE = re.compile(r"\.part(\d+)\.html$")
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """
+    Write text to path so readers see either the old or the new content.
+
+    The data is written and fsynced to a temporary file in the same
+    directory, then renamed over path.
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def is_complete_html(path: Path) -> bool:
+    """
+    True if path exists and ends with a closing </html> tag.
+
+    A redirect cut short by a crash (written before atomic writes, or by
+    another tool) fails this check and is regenerated. Only the tail of
+    the file is read.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 64))
+            return b"</html>" in f.read().lower()
+    except OSError:
+        return False
+
+
+def redirect_url(html_file: Path) -> Optional[str]:
+    """Return the URL an existing HTML redirect file points to."""
+    try:
+        match = REDIRECT_URL_RE.search(html_file.read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError):
+        return None
+    return match.group(1) if match else None
+
+
+def deck_html_paths(source: Path) -> list[Path]:
+    """Existing redirect files for source: talk.html, talk.part2.html, ..."""
+    first = source.with_suffix(".html")
+    paths = [first] if first.exists() else []
+    parts = []
+    for candidate in source.parent.glob(f"{source.stem}.part*.html"):
+        match = _PART_RE.search(candidate.name)
+        if match and candidate.name == f"{source.stem}.part{match.group(1)}.html":
+            parts.append((int(match.group(1)), candidate))
+    return paths + [p for _, p in sorted(parts)]
+
+
+class ResultsIndex:
+    """
+    Every generated deck in a tree, kept as one JSON or CSV file.
+
+    The format follows the file extension (.csv, anything else is JSON).
+    Entries are keyed by source file and variant ("" for the plain
+    output, e.g. "document" for fan-out variants); recording a result
+    replaces all entries for that source and variant, so a file that
+    shrinks from three decks to one leaves one entry. The file is
+    rewritten atomically at most every FLUSH_INTERVAL seconds while
+    results arrive, and by close(). Each rewrite merges with the file on
+    disk, so runs sharing an index keep each other's entries.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.csv = path.suffix.lower() == ".csv"
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Sources recorded since the last flush; these win over the file
+        self._changed = set()
+        self._flushed = time.monotonic()
+        self._entries = self._read()
+
+    def _read(self) -> dict:
+        """Entries currently on disk, keyed by (source, variant)."""
+        entries = {}
+        if not self.path.exists():
+            return entries
+        try:
+            text = self.path.read_text(encoding="utf-8")
+            if self.csv:
+                rows = list(csv.DictReader(io.StringIO(text)))
+            else:
+                rows = json.loads(text).get("decks", [])
+            for row in rows:
+                row["part"] = int(row["part"])
+                row["parts"] = int(row["parts"])
+                row.setdefault("variant", "")
+                entries.setdefault((row["source"], row["variant"]), []).append(row)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # A corrupt index is rebuilt from the results of this run
+            return {}
+        return entries
+
+    def __contains__(self, source: Path) -> bool:
+        with self._lock:
+            return (str(source), "") in self._entries
+
+    def record(self, source: Path, decks: list[dict], variant: str = "") -> None:
+        """
+        Replace the entries for source and variant with its decks.
+
+        Args:
+            source: Markdown file the decks were generated from
+            decks: One dict per deck with url and html_path, in part order
+            variant: Variant label of the decks, "" for the plain output
+        """
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        entries = [
+            {
+                "source": str(source),
+                "variant": variant,
+                "part": index,
+                "parts": len(decks),
+                "url": deck["url"],
+                "html_path": str(deck["html_path"]),
+                "updated": now,
+            }
+            for index, deck in enumerate(decks, 1)
+        ]
+        with self._lock:
+            self._entries[(str(source), variant)] = entries
+            self._changed.add((str(source), variant))
+        self.flush()
+
+    def record_result(self, result: dict) -> None:
+        """Record a successful generate/batch result; failures are ignored."""
+        if not result.get("success") or not result.get("url"):
+            return
+        decks = result.get("parts") or [{"url": result["url"], "html_path": result["html_path"]}]
+        self.record(Path(result["path"]), decks)
+
+    def record_existing(self, source: Path) -> None:
+        """
+        Index the redirects already next to source, if it is not indexed.
+
+        Lets a tree generated before the index existed, or a run killed
+        between flushes, fill in the index without regenerating anything.
+        """
+        if source in self:
+            return
+        decks = []
+        for html_path in deck_html_paths(source):
+            url = redirect_url(html_path)
+            if url is None:
+                return
+            decks.append({"url": url, "html_path": html_path})
+        if decks:
+            self.record(source, decks)
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Merge with the file on disk and rewrite it, if anything was
+        recorded and FLUSH_INTERVAL has passed (or force).
+        """
+        with self._lock:
+            if not self._changed:
+                return
+            if not force and time.monotonic() - self._flushed < self.flush_interval:
+                return
+            changed = {key: self._entries[key] for key in self._changed}
+            self._entries = {**self._read(), **changed}
+            rows = [row for key in sorted(self._entries) for row in self._entries[key]]
+            if self.csv:
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=INDEX_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(rows)
+                text = buffer.getvalue()
+            else:
+                text = json.dumps({"decks": rows}, indent=1)
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write_text(self.path, text)
+            except OSError:
+                return
+            self._changed.clear()
+            self._flushed = time.monotonic()
+
+    def close(self) -> None:
+        self.flush(force=True)
+
+
+def open_results_index(config: dict) -> Optional[ResultsIndex]:
+    """The configured results index, or None if results_index is empty."""
+    path = get_results_index_path(config)
+    return ResultsIndex(path) if path is not None else None
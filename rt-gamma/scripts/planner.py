@@ -0,0 +1,251 @@
+"""
+Dry-run planning for batch mode.
+
+Walks a folder the way batch.py would and reports what a real run
+would do (submit, split, skip) together with estimated API calls,
+credits and wall-clock time. Nothing is sent to the API and no files,
+caches or manifests are written.
+"""
+import math
+from pathlib import Path
+from typing import Optional
+
+from batch import (
+    file_title,
+    load_batch_settings,
+    opted_out,
+    output_outdated,
+    plan_content,
+    walk_candidates,
+)
+from cache import ResultCache, content_key
+from config import get_cache_path, get_manifest_path, get_timings_path
+from gamma_client import PollStrategy
+from manifest import BatchManifest
+from markdown_utils import prepare_content, read_markdown_file
+from output import is_complete_html
+from themes import open_catalog, resolve_theme_id
+
+# Assumed generation time until the timings history has real completions
+DEFAULT_GENERATION_SECONDS = 60.0
+
+
+def plan_batch(
+    directory: str,
+    concurrency: Optional[int] = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Plan a batch run without calling the API.
+
+    Each matching file gets an action:
+        submit     - one deck will be generated (or reattached to an
+                     interrupted run's generation)
+        split      - the file is over the limits and becomes several decks
+        cached     - every deck is in the result cache or was finished by
+                     an interrupted run; only the redirect would be written
+        current    - the existing .html is up to date (skipped)
+        opted_out  - frontmatter sets `gamma: false` (skipped)
+        invalid    - the file cannot be read or planned (would fail)
+
+    Args:
+        directory: Directory to plan
+        concurrency: Generations kept in flight at once (defaults to
+            batch_concurrency from config)
+        use_cache: Plan as batch.py would with or without --no-cache
+
+    Returns:
+        dict with counts per action, deck and card totals, estimated
+        api_calls, credits and wall-clock seconds, the assumptions behind
+        them, and a per-file list
+    """
+    try:
+        dir_path, config, concurrency = load_batch_settings(directory, concurrency)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    theme = str(config.get("theme", "")).strip()
+    config["theme"] = resolve_theme_id(config, offline=True) or ""
+    cache = ResultCache(
+        get_cache_path(),
+        max_entries=config.get("cache_max_entries", 1000),
+        max_age_days=config.get("cache_max_age_days", 90),
+    )
+    manifest = BatchManifest(get_manifest_path())
+
+    pattern = config.get("batch_pattern", "*_presentation.md")
+    files = []
+    for md_file in walk_candidates(dir_path, pattern, config):
+        files.append(_plan_one(md_file, config, cache if use_cache else None, manifest))
+
+    counts = {action: 0 for action in
+              ("submit", "split", "cached", "current", "opted_out", "invalid")}
+    for entry in files:
+        counts[entry["action"]] += 1
+
+    decks = [d for entry in files for d in entry.get("decks", [])]
+    new_decks = [d for d in decks if d["state"] == "new"]
+    reattach = [d for d in decks if d["state"] == "in_flight"]
+    # Files that keep a worker busy while Gamma generates
+    busy_files = sum(
+        1 for entry in files
+        if any(d["state"] in ("new", "in_flight") for d in entry.get("decks", []))
+    )
+
+    strategy = PollStrategy(get_timings_path())
+    typical = strategy.typical_duration()
+    generation_s = typical if typical is not None else DEFAULT_GENERATION_SECONDS
+    polls = strategy.expected_polls(generation_s) * (len(new_decks) + len(reattach))
+    theme_calls = int(bool(theme) and _theme_needs_fetch(config, theme))
+
+    per_card = float(config.get("credits_per_card", 3))
+    per_deck = float(config.get("credits_per_deck", 0))
+    cards = sum(d["num_cards"] for d in new_decks)
+
+    wall_clock, bottleneck = _estimate_wall_clock(
+        busy_files, len(new_decks), polls, generation_s, concurrency, config
+    )
+
+    return {
+        "success": counts["invalid"] == 0,
+        "dry_run": True,
+        "directory": str(dir_path),
+        "pattern": pattern,
+        "total": len(files),
+        **counts,
+        "decks": {"submit": len(new_decks), "reattach": len(reattach),
+                  "reuse": len(decks) - len(new_decks) - len(reattach)},
+        "cards": cards,
+        "api_calls": {
+            "create": len(new_decks),
+            "status": polls,
+            "themes": theme_calls,
+            "total": len(new_decks) + polls + theme_calls,
+        },
+        "credits": round(per_deck * len(new_decks) + per_card * cards, 1),
+        "wall_clock_s": round(wall_clock, 1),
+        "bottleneck": bottleneck,
+        "assumptions": {
+            "concurrency": concurrency,
+            "rate_limit_create": float(config.get("rate_limit_create", 30)),
+            "rate_limit_status": float(config.get("rate_limit_status", 120)),
+            "generation_s": round(generation_s, 1),
+            "generation_s_source": "history" if typical is not None else "default",
+            "credits_per_card": per_card,
+            "credits_per_deck": per_deck,
+        },
+        "files": files,
+    }
+
+
+def _plan_one(
+    md_file: Path,
+    config: dict,
+    cache: Optional[ResultCache],
+    manifest: BatchManifest,
+) -> dict:
+    """Decide what batch mode would do with one file, reading it at most once."""
+    entry = {"path": str(md_file)}
+    if opted_out(md_file):
+        entry["action"] = "opted_out"
+        return entry
+
+    html_file = md_file.with_suffix(".html")
+    complete = is_complete_html(html_file)
+    if complete and cache is None:
+        entry["action"] = "current"
+        return entry
+
+    try:
+        content = read_markdown_file(str(md_file))
+        title = file_title(content, md_file)
+        final_content = prepare_content(content, title)
+        key = content_key(final_content, config)
+        if complete and not output_outdated(md_file, html_file, cache, key):
+            entry["action"] = "current"
+            return entry
+        decks = plan_content(final_content, title, config)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        entry.update(action="invalid", error=str(e))
+        return entry
+
+    entry["title"] = title
+    entry["decks"] = []
+    for index, deck in enumerate(decks, 1):
+        if len(decks) == 1:
+            label, deck_key = str(md_file), key
+        else:
+            label, deck_key = f"{md_file}#part{index}", content_key(deck["content"], config)
+        entry["decks"].append({
+            "num_cards": deck["num_cards"],
+            "tokens": deck["tokens"],
+            "state": _deck_state(label, deck_key, cache, manifest),
+        })
+
+    if all(d["state"] == "cached" for d in entry["decks"]):
+        entry["action"] = "cached"
+    else:
+        entry["action"] = "split" if len(decks) > 1 else "submit"
+    return entry
+
+
+def _deck_state(
+    label: str,
+    key: str,
+    cache: Optional[ResultCache],
+    manifest: BatchManifest,
+) -> str:
+    """'cached', 'in_flight' (reattach to an interrupted run) or 'new'."""
+    if cache is not None and cache.get(key) is not None:
+        return "cached"
+    state = manifest.resume_state(label, key)
+    if state is None:
+        return "new"
+    return "cached" if state["status"] == "completed" else "in_flight"
+
+
+def _theme_needs_fetch(config: dict, theme: str) -> bool:
+    """True if resolving the theme would refresh the catalog from the API."""
+    catalog = open_catalog(config)
+    return catalog.resolve(theme) is None or not catalog.is_fresh()
+
+
+def _estimate_wall_clock(
+    busy_files: int,
+    creates: int,
+    polls: int,
+    generation_s: float,
+    concurrency: int,
+    config: dict,
+) -> tuple[float, str]:
+    """
+    Estimate batch duration as the slowest of three limits.
+
+    - concurrency: files run in waves of `concurrency`, each taking
+      about one generation (a split file's decks run side by side)
+    - create rate: submissions beyond the token bucket's burst are paced
+      by rate_limit_create, and the last one still has to generate
+    - status rate: every status check draws from rate_limit_status
+
+    Returns:
+        Tuple of (seconds, name of the limiting factor)
+    """
+    if busy_files == 0:
+        return 0.0, "none"
+
+    bounds = {"concurrency": math.ceil(busy_files / concurrency) * generation_s}
+
+    create_rate = float(config.get("rate_limit_create", 30))
+    if create_rate > 0 and creates:
+        burst = max(1.0, create_rate / 10.0)
+        bounds["rate_limit_create"] = (
+            max(0.0, creates - burst) * 60.0 / create_rate + generation_s
+        )
+
+    status_rate = float(config.get("rate_limit_status", 120))
+    if status_rate > 0 and polls:
+        burst = max(1.0, status_rate / 10.0)
+        bounds["rate_limit_status"] = max(0.0, polls - burst) * 60.0 / status_rate
+
+    bottleneck = max(bounds, key=bounds.get)
+    return bounds[bottleneck], bottleneck
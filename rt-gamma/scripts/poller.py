@@ -0,0 +1,296 @@
+"""Shared status poller for in-flight Gamma generations."""
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from gamma_client import GammaAPIClient, PollStrategy
+from telemetry import current_trace, tracing
+
+# Extra seconds wait() allows past a generation's deadline for the last
+# status request (and its retries) before giving up on the poller
+WAIT_GRACE = 60.0
+
+
+class StatusPoller:
+    """
+    Track every outstanding generationId and poll them from one thread.
+
+    Each generation is scheduled by a PollStrategy (fast first checks,
+    exponential backoff, Retry-After hints). On each tick of a shared
+    timer the poller checks at most `max_per_tick` generations that are
+    due, in round-robin order, so the total number of status requests is
+    bounded by the tick interval rather than by how many decks are in
+    flight. Completion and failure are reported through the callbacks
+    passed to `track`; a callback that raises fails only its own
+    generation.
+    """
+
+    def __init__(
+        self,
+        client: GammaAPIClient,
+        strategy: Optional[PollStrategy] = None,
+        interval: float = 0.5,
+        max_per_tick: int = 2,
+        timeout: float = 120.0,
+    ):
+        self.client = client
+        self.strategy = strategy or PollStrategy()
+        self.interval = interval
+        self.max_per_tick = max(1, max_per_tick)
+        self.timeout = timeout
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def track(
+        self,
+        generation_id: str,
+        on_complete: Callable[[dict], None],
+        on_failure: Callable[[str], None],
+        on_status: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """
+        Start tracking a generation.
+
+        Args:
+            generation_id: ID returned by the generation endpoint
+            on_complete: Called with the final status dict when completed
+            on_failure: Called with an error message on failure or timeout
+            on_status: Called with the new status whenever a still-pending
+                generation changes status
+        """
+        self._add(self._new_entry(generation_id, on_complete, on_failure, on_status))
+
+    def _add(self, entry: dict) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("StatusPoller is closed")
+            self._queue.append(entry)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="gamma-status-poller", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def wait(
+        self,
+        generation_id: str,
+        on_status: Optional[Callable[[str], None]] = None,
+    ) -> dict:
+        """
+        Track a generation and block until it finishes.
+
+        Gives up WAIT_GRACE seconds after the generation's deadline, in
+        case the poller itself is stuck.
+
+        Returns the final status dict, or a dict with status 'failed'
+        and an error message.
+        """
+        done = threading.Event()
+        outcome = {}
+
+        def on_complete(status: dict) -> None:
+            outcome.update(status)
+            done.set()
+
+        def on_failure(error: str) -> None:
+            outcome.update({"status": "failed", "error": error})
+            done.set()
+
+        entry = self._new_entry(generation_id, on_complete, on_failure, on_status)
+        self._add(entry)
+        if not done.wait(self.timeout + WAIT_GRACE):
+            self._forget(entry)
+            return {"status": "failed", "error": self._timeout_error()}
+        return outcome
+
+    def wait_all(self, generation_ids: list[str]) -> list[dict]:
+        """
+        Track several generations at once and block until all finish.
+
+        Unlike calling wait() in turn, every generation is polled from
+        the start, so this takes about as long as the slowest one. Like
+        wait(), gives up WAIT_GRACE seconds after the deadline.
+
+        Returns the final status dicts in the order of generation_ids.
+        """
+        remaining = threading.Semaphore(0)
+        outcomes = [{} for _ in generation_ids]
+        entries = []
+
+        def finisher(outcome: dict):
+            def on_complete(status: dict) -> None:
+                outcome.update(status)
+                remaining.release()
+
+            def on_failure(error: str) -> None:
+                outcome.update({"status": "failed", "error": error})
+                remaining.release()
+
+            return on_complete, on_failure
+
+        for generation_id, outcome in zip(generation_ids, outcomes):
+            entry = self._new_entry(generation_id, *finisher(outcome), None)
+            entries.append(entry)
+            self._add(entry)
+        give_up = time.monotonic() + self.timeout + WAIT_GRACE
+        for _ in generation_ids:
+            if not remaining.acquire(timeout=max(0.0, give_up - time.monotonic())):
+                break
+        for entry, outcome in zip(entries, outcomes):
+            if not outcome:
+                self._forget(entry)
+                outcome.update({"status": "failed", "error": self._timeout_error()})
+        return outcomes
+
+    def close(self) -> None:
+        """Stop the poller thread. Outstanding generations are abandoned."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StatusPoller":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _new_entry(
+        self,
+        generation_id: str,
+        on_complete: Callable[[dict], None],
+        on_failure: Callable[[str], None],
+        on_status: Optional[Callable[[str], None]],
+    ) -> dict:
+        now = time.monotonic()
+        return {
+            "id": generation_id,
+            "started": now,
+            "deadline": now + self.timeout,
+            "due": now + self.strategy.first_delay(),
+            "attempts": 0,
+            "last_status": None,
+            "on_complete": on_complete,
+            "on_failure": on_failure,
+            "on_status": on_status,
+            # Status polls are counted against the caller's trace
+            "trace": current_trace.get(),
+        }
+
+    def _forget(self, entry: dict) -> None:
+        """Stop tracking entry, also if it is being polled right now."""
+        with self._cond:
+            entry["forgotten"] = True
+            try:
+                self._queue.remove(entry)
+            except ValueError:
+                pass
+
+    def _timeout_error(self) -> str:
+        return f"Timeout: Generation took longer than {self.timeout / 60:g} minutes"
+
+    def _notify(self, entry: dict, callback: str, *args) -> Optional[Exception]:
+        """
+        Call one of entry's callbacks. Returns the exception if it raised.
+
+        A failing callback must not take down the poller thread (and
+        with it every other pending generation).
+        """
+        func = entry[callback]
+        if func is None:
+            return None
+        try:
+            func(*args)
+        except Exception as e:
+            return e
+        return None
+
+    def _take_due(self, now: float) -> list[dict]:
+        """Remove up to max_per_tick due entries, preserving queue order."""
+        batch = []
+        remaining = deque()
+        while self._queue:
+            entry = self._queue.popleft()
+            if len(batch) < self.max_per_tick and entry["due"] <= now:
+                batch.append(entry)
+            else:
+                remaining.append(entry)
+        self._queue = remaining
+        return batch
+
+    def _run(self) -> None:
+        next_tick = time.monotonic()
+        while True:
+            with self._cond:
+                # Wait for the next shared tick and for something to be due;
+                # new work never shortens the wait for the next tick
+                while not self._closed:
+                    if not self._queue:
+                        self._cond.wait()
+                        continue
+                    wake = max(next_tick, min(e["due"] for e in self._queue))
+                    remaining = wake - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+                now = time.monotonic()
+                batch = self._take_due(now)
+            next_tick = now + self.interval
+
+            for entry in batch:
+                try:
+                    pending = self._poll(entry)
+                except Exception as e:
+                    self._notify(entry, "on_failure", str(e))
+                    pending = False
+                if pending:
+                    # Still pending: rejoin at the back of the round-robin
+                    with self._cond:
+                        if not entry.get("forgotten"):
+                            self._queue.append(entry)
+
+    def _poll(self, entry: dict) -> bool:
+        """Poll one generation. Returns True if it is still pending."""
+        try:
+            with tracing(entry["trace"]):
+                status, retry_after = self.client.poll_generation_status(entry["id"])
+        except Exception as e:
+            self._notify(entry, "on_failure", str(e))
+            return False
+        return self._update(entry, status, retry_after)
+
+    def _update(self, entry: dict, status: dict, retry_after: Optional[float]) -> bool:
+        """Apply a polled status to entry. Returns True if it is still pending."""
+        entry["attempts"] += 1
+        now = time.monotonic()
+        state = status.get("status")
+        if state == "completed":
+            self.strategy.record(now - entry["started"])
+            self._notify(entry, "on_complete", status)
+            return False
+        if state == "failed":
+            self._notify(entry, "on_failure", status.get("error", "Generation failed"))
+            return False
+
+        if state != entry["last_status"]:
+            entry["last_status"] = state
+            error = self._notify(entry, "on_status", state)
+            if error is not None:
+                self._notify(entry, "on_failure", f"Status callback failed: {error}")
+                return False
+
+        if now >= entry["deadline"]:
+            self._notify(entry, "on_failure", self._timeout_error())
+            return False
+
+        delay = self.strategy.next_delay(entry["attempts"], retry_after)
+        entry["due"] = min(now + delay, entry["deadline"])
+        return True
@@ -0,0 +1,93 @@
+"""
+Memoized project-root lookup and TOML loading shared by the rt plugins.
+
+Plugins are installed independently, so this module is vendored
+unchanged into each plugin's scripts/ folder (rt-gamma and rt-voice).
+Keep the copies identical. Must stay compatible with Python 3.8.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+_lock = threading.Lock()
+# cwd -> project root
+_roots: Dict[str, Path] = {}
+# path -> (mtime_ns, size, parsed document)
+_documents: Dict[str, Tuple[int, int, dict]] = {}
+
+
+def find_project_root(start: Optional[Path] = None) -> Path:
+    """
+    Find the project root: the nearest directory at or above start
+    (default: cwd) that contains a .claude directory.
+
+    The walk happens once per starting directory per process; later calls
+    are a dict lookup. Falls back to start if no .claude is found.
+    """
+    key = str(start) if start is not None else os.getcwd()
+    with _lock:
+        root = _roots.get(key)
+    if root is not None:
+        return root
+
+    current = Path(key)
+    root = current
+    for parent in [current] + list(current.parents):
+        if (parent / ".claude").is_dir():
+            root = parent
+            break
+
+    with _lock:
+        _roots[key] = root
+    return root
+
+
+def load_toml(path: Path) -> dict:
+    """
+    Parse a TOML file, reusing the previous parse while it is unchanged.
+
+    The cache is keyed by path and validated with a single stat (mtime
+    and size), so repeated loads in one process cost no parsing.
+
+    Returns:
+        A shallow copy of the parsed document
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If the file is not valid TOML (or, without tomllib or
+            tomli, uses TOML features the flat fallback does not handle)
+    """
+    key = str(path)
+    stat = os.stat(key)
+    with _lock:
+        cached = _documents.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return dict(cached[2])
+
+    with open(key, "rb") as f:
+        document = _toml_parser().load(f)
+
+    with _lock:
+        _documents[key] = (stat.st_mtime_ns, stat.st_size, document)
+    return dict(document)
+
+
+def clear_caches() -> None:
+    """Forget memoized roots and parsed files (e.g. after chdir in a long-lived process)."""
+    with _lock:
+        _roots.clear()
+        _documents.clear()
+
+
+def _toml_parser():
+    """tomllib (3.11+), else tomli if installed, else the flat parser in flat_toml."""
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            import flat_toml
+            return flat_toml
+    return tomllib
@@ -0,0 +1,145 @@
+"""
+Standard-library stand-in for the parts of requests.Session rt-gamma uses.
+
+GammaAPIClient falls back to this when requests is not installed, so a
+missing package costs nothing at startup instead of a pip install. It
+keeps a small pool of keep-alive http.client connections per host and
+supports JSON bodies, extra headers and timeouts.
+"""
+import http.client
+import json
+import socket
+import ssl
+import threading
+from types import SimpleNamespace
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+class HTTPError(Exception):
+    """Raised by Response.raise_for_status for 4xx/5xx responses."""
+
+    def __init__(self, message: str, response: "Response"):
+        super().__init__(message)
+        self.response = response
+
+
+class Response:
+    """Status code, case-insensitive headers and body of a finished request."""
+
+    def __init__(self, url: str, status_code: int, headers, content: bytes, body: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.request = SimpleNamespace(body=body)
+
+    def json(self):
+        return json.loads(self.content.decode("utf-8"))
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} Error for url: {self.url}", self)
+
+
+class ConnectError(ConnectionError):
+    """A connection could not be established; nothing was sent."""
+
+
+# Errors treated like requests.ConnectionError / requests.Timeout
+TRANSIENT_ERRORS = (OSError, http.client.HTTPException, socket.timeout)
+
+
+class Session:
+    """Thread-safe session with default headers and per-host keep-alive pools."""
+
+    def __init__(self, pool_size: int = 10):
+        self.headers = {}
+        self.pool_size = pool_size
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl = None
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        json: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ) -> Response:
+        parts = urlsplit(url)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        key = (parts.scheme, parts.hostname, parts.port)
+        body = _json_dumps(json) if json is not None else None
+        request_headers = {**self.headers, **(headers or {})}
+
+        # A pooled connection may have been closed by the server; retry
+        # once on a fresh connection if it was
+        for reuse in (True, False):
+            conn = self._take_idle(key) if reuse else None
+            if conn is None:
+                conn = self._connect(parts, timeout)
+                reuse = False
+            else:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, target or "/", body=body, headers=request_headers)
+                raw = conn.getresponse()
+                content = raw.read()
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.BadStatusLine):
+                conn.close()
+                if reuse:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if raw.will_close:
+                conn.close()
+            else:
+                self._put_idle(key, conn)
+            return Response(url, raw.status, raw.headers, content, body)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _connect(self, parts, timeout: Optional[float]) -> http.client.HTTPConnection:
+        """Open a new connection. Raises ConnectError if that fails."""
+        if parts.scheme == "https":
+            if self._ssl is None:
+                self._ssl = ssl.create_default_context()
+            conn = http.client.HTTPSConnection(
+                parts.hostname, parts.port, timeout=timeout, context=self._ssl
+            )
+        else:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        try:
+            conn.connect()
+        except OSError as e:
+            conn.close()
+            raise ConnectError(f"Could not connect to {parts.hostname}: {e}") from e
+        return conn
+
+    def _take_idle(self, key) -> Optional[http.client.HTTPConnection]:
+        with self._lock:
+            conns = self._idle.get(key)
+            return conns.pop() if conns else None
+
+    def _put_idle(self, key, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.pool_size:
+                conns.append(conn)
+                return
+        conn.close()
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj).encode("utf-8")
@@ -0,0 +1,117 @@
+"""Per-file timing spans and request counters for rt-gamma runs."""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Trace of the file currently being processed by this thread or task
+current_trace: ContextVar[Optional["FileTrace"]] = ContextVar("current_trace", default=None)
+
+
+class FileTrace:
+    """
+    Timing phases and request counters for one file.
+
+    Phases are wall-clock seconds spent reading/preparing content,
+    submitting to the API, waiting for Gamma to finish (queue), and
+    writing output. Counters track requests, status polls, retries,
+    bytes sent and time spent waiting on the client rate limiter.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.started = time.monotonic()
+        self.phases = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Add the duration of the enclosed block to a phase."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.monotonic() - start)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "total_s": round(time.monotonic() - self.started, 3),
+                "phases": {k: round(v, 3) for k, v in self.phases.items()},
+                "counters": {
+                    k: round(v, 3) if isinstance(v, float) else v
+                    for k, v in self.counters.items()
+                },
+            }
+
+
+@contextmanager
+def tracing(trace: FileTrace) -> Iterator[FileTrace]:
+    """Make trace the current trace for the enclosed block."""
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+
+
+def count(name: str, amount: float = 1) -> None:
+    """Increment a counter on the current trace, if any."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.count(name, amount)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a phase on the current trace, if any."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name):
+        yield
+
+
+def summarize(timings: list[dict], wall: float) -> dict:
+    """Aggregate per-file timing dicts into batch totals."""
+    phases = {}
+    counters = {}
+    for timing in timings:
+        for name, value in timing.get("phases", {}).items():
+            phases[name] = phases.get(name, 0.0) + value
+        for name, value in timing.get("counters", {}).items():
+            counters[name] = counters.get(name, 0) + value
+    return {
+        "wall_s": round(wall, 3),
+        "files": len(timings),
+        "phases": {k: round(v, 3) for k, v in phases.items()},
+        "counters": {k: round(v, 3) if isinstance(v, float) else v for k, v in counters.items()},
+    }
+
+
+class TraceWriter:
+    """Append trace records to a JSONL file, one line per record."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, record: dict) -> None:
+        line = json.dumps({"ts": round(time.time(), 3), **record}) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Local catalog of Gamma themes.
+
+The workspace theme list rarely changes, so it is kept on disk with a
+TTL and refreshed with a conditional request (ETag) once it expires.
+Themes can then be resolved by id, name or a close misspelling of a
+name without a network round trip.
+
+Usage: themes.py [QUERY] [--refresh]
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import config_exists, get_config_path, get_themes_path, load_config
+from gamma_client import GammaAPIClient
+
+# Minimum difflib similarity for a fuzzy name match
+FUZZY_CUTOFF = 0.75
+
+
+def normalize_name(name: str) -> str:
+    """Casefold and collapse punctuation/whitespace: 'Night-Sky ' -> 'night sky'."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", name.casefold()).split())
+
+
+def workspace_key(config: dict) -> str:
+    """Identify the workspace a catalog belongs to without storing the API key."""
+    source = f"{config.get('api_base_url', '')}\0{config.get('api_key', '')}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+class ThemeCatalog:
+    """
+    Theme list persisted as JSON, indexed in memory by id and normalized name.
+
+    A catalog belongs to one workspace (API key and base URL); a catalog
+    saved for another workspace is treated as empty.
+    """
+
+    def __init__(self, path: Path, workspace: str, ttl_hours: float = 24):
+        self.path = path
+        self.workspace = workspace
+        self.ttl = ttl_hours * 3600
+        self.themes = []
+        self.etag = None
+        self.fetched_at = 0.0
+        self._by_id = {}
+        self._by_name = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("workspace") != self.workspace:
+                return
+            self._set(list(data.get("themes", [])))
+            self.etag = data.get("etag")
+            self.fetched_at = float(data.get("fetched_at", 0))
+        except (OSError, ValueError, AttributeError, TypeError):
+            # A corrupt catalog just means one extra fetch
+            self._set([])
+
+    def _set(self, themes: list[dict]) -> None:
+        self.themes = [t for t in themes if isinstance(t, dict) and t.get("id")]
+        self._by_id = {t["id"]: t for t in self.themes}
+        self._by_name = {}
+        for theme in self.themes:
+            name = normalize_name(theme.get("name", ""))
+            if name:
+                self._by_name.setdefault(name, theme)
+
+    def is_fresh(self) -> bool:
+        """True if the catalog was fetched within the TTL."""
+        return bool(self._by_id) and time.time() - self.fetched_at < self.ttl
+
+    def refresh(
+        self,
+        client: GammaAPIClient,
+        force: bool = False,
+        revalidate: bool = False,
+    ) -> bool:
+        """
+        Re-fetch the theme list if it has expired.
+
+        Sends the stored ETag so an unchanged list costs a 304 with no body.
+
+        Args:
+            client: API client used for the request
+            force: Refresh even if the catalog is still fresh, without
+                sending the ETag
+            revalidate: Ask even if the catalog is still fresh, sending
+                the ETag (e.g. when a theme may have been added since)
+
+        Returns:
+            True if a request was made
+        """
+        if self.is_fresh() and not force and not revalidate:
+            return False
+        themes, etag = client.fetch_themes(None if force else self.etag)
+        if themes is not None:
+            self._set(themes)
+            self.etag = etag
+        self.fetched_at = time.time()
+        self.save()
+        return True
+
+    def get(self, theme_id: str) -> Optional[dict]:
+        """Look up a theme by exact id."""
+        return self._by_id.get(theme_id)
+
+    def resolve(self, query: str) -> Optional[dict]:
+        """
+        Find a theme by id, name, or the closest name above FUZZY_CUTOFF.
+
+        Returns the theme dict, or None if nothing matches.
+        """
+        query = query.strip()
+        theme = self._by_id.get(query)
+        if theme is not None:
+            return theme
+        name = normalize_name(query)
+        theme = self._by_name.get(name)
+        if theme is not None:
+            return theme
+        close = difflib.get_close_matches(name, self._by_name, n=1, cutoff=FUZZY_CUTOFF)
+        return self._by_name[close[0]] if close else None
+
+    def suggest(self, query: str, limit: int = 5) -> list[dict]:
+        """Themes whose names are most similar to query, best first."""
+        names = difflib.get_close_matches(normalize_name(query), self._by_name, n=limit, cutoff=0.4)
+        return [self._by_name[n] for n in names]
+
+    def save(self) -> None:
+        """Write the catalog atomically."""
+        data = json.dumps({
+            "workspace": self.workspace,
+            "fetched_at": self.fetched_at,
+            "etag": self.etag,
+            "themes": self.themes,
+        })
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(data, encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def open_catalog(config: dict) -> ThemeCatalog:
+    """Open the project's theme catalog for the configured workspace."""
+    return ThemeCatalog(
+        get_themes_path(),
+        workspace_key(config),
+        ttl_hours=float(config.get("theme_cache_ttl_hours", 24)),
+    )
+
+
+def resolve_theme_id(config: dict, offline: bool = False) -> Optional[str]:
+    """
+    Resolve the configured theme (id or name) to a theme id.
+
+    Resolution is local while the catalog is fresh. The API is only
+    asked when the catalog has expired or the theme is not in it. If the
+    theme still cannot be found, or the API is unreachable, the value is
+    passed through unchanged so the API can report it.
+
+    Args:
+        config: Loaded config
+        offline: Only consult the local catalog, even if it has expired
+
+    Returns:
+        Theme id, or None if no theme is configured
+    """
+    value = str(config.get("theme", "")).strip()
+    if not value:
+        return None
+
+    catalog = open_catalog(config)
+    theme = catalog.resolve(value)
+    if not offline and (theme is None or not catalog.is_fresh()):
+        try:
+            # A theme missing from a fresh catalog may be new or renamed,
+            # so check the API (a 304 if nothing changed)
+            client = GammaAPIClient.from_config(config)
+            if catalog.refresh(client, revalidate=theme is None):
+                theme = catalog.resolve(value)
+        except Exception:
+            pass
+    return theme["id"] if theme is not None else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or look up Gamma themes")
+    parser.add_argument("query", nargs="?", default=None)
+    parser.add_argument("--refresh", action="store_true")
+    args = parser.parse_args()
+
+    if not config_exists():
+        print(json.dumps({
+            "success": False,
+            "error": f"Config not found. Create {get_config_path()}"
+        }))
+        sys.exit(1)
+    try:
+        config = load_config()
+    except ValueError as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
+
+    catalog = open_catalog(config)
+    try:
+        catalog.refresh(GammaAPIClient.from_config(config), force=args.refresh)
+    except Exception as e:
+        if not catalog.themes:
+            print(json.dumps({"success": False, "error": f"Could not fetch themes: {e}"}))
+            sys.exit(1)
+
+    if args.query is None:
+        print(json.dumps({"success": True, "themes": catalog.themes}, indent=2))
+        return
+
+    theme = catalog.resolve(args.query)
+    if theme is None:
+        print(json.dumps({
+            "success": False,
+            "error": f"No theme matching '{args.query}'",
+            "suggestions": catalog.suggest(args.query),
+        }, indent=2))
+        sys.exit(1)
+    print(json.dumps({"success": True, "theme": theme}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Watch mode for batch generation.
+
+Keeps an index of every matching file (path -> mtime, size, content
+hash) and regenerates only files whose content actually changed. Changes
+are picked up with inotify on Linux and by periodic stat rescans
+elsewhere; bursts of saves are debounced into one round, and each round
+reuses the same API client and status poller.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from batch import (
+    load_batch_settings,
+    needs_processing,
+    opted_out,
+    run_threaded,
+    walk_candidates,
+)
+from cache import ResultCache
+from config import get_cache_path, get_manifest_path, get_timings_path
+from discovery import DEFAULT_IGNORE, GitIgnore, is_candidate
+from gamma_client import GammaAPIClient, PollStrategy
+from manifest import BatchManifest
+from output import open_results_index
+from poller import StatusPoller
+from themes import resolve_theme_id
+
+
+class FileIndex:
+    """
+    Map each watched path to (mtime_ns, size, sha256 of its bytes).
+
+    A file counts as changed only when its content hash changes; a touch
+    or an editor rewriting identical bytes costs one stat and one hash.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def __contains__(self, path: Path) -> bool:
+        return path in self._entries
+
+    def paths(self) -> list[Path]:
+        return list(self._entries)
+
+    def update(self, path: Path) -> bool:
+        """
+        Refresh path's entry. Returns True if it is new or its content changed.
+
+        A path that no longer exists is dropped and reported unchanged.
+        """
+        try:
+            stat = os.stat(path)
+            previous = self._entries.get(path)
+            if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                return False
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            self._entries.pop(path, None)
+            return False
+        self._entries[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return previous is None or previous[2] != digest
+
+    def discard(self, path: Path) -> None:
+        self._entries.pop(path, None)
+
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_DELETE_SELF | IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Directory watches through the Linux inotify API, called via ctypes.
+
+    wait() returns the paths of files written, moved or deleted in a
+    watched directory, or None when the tree must be rescanned (a
+    directory appeared, a .gitignore changed, or the event queue
+    overflowed).
+    """
+
+    name = "inotify"
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        self._wds = {}
+
+    @staticmethod
+    def available() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"))
+            return hasattr(libc, "inotify_init1")
+        except OSError:
+            return False
+
+    def watch(self, directories: Iterable[Path]) -> None:
+        """Watch each directory not already watched; vanished ones are skipped."""
+        for directory in directories:
+            if directory in self._wds:
+                continue
+            wd = self._add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = directory
+                self._wds[directory] = wd
+
+    def wait(self, timeout: Optional[float]) -> Optional[set]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        rescan = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # The directory was removed or unmounted
+                del self._dirs[wd]
+                self._wds.pop(directory, None)
+                continue
+            if mask & IN_DELETE_SELF:
+                continue
+            if mask & IN_ISDIR:
+                # New or moved-in directories need watches and a scan;
+                # removed ones drop their files from the index
+                rescan = True
+                continue
+            path = directory / os.fsdecode(name)
+            if path.name == ".gitignore":
+                rescan = True
+            elif not mask & IN_CREATE:
+                # Creation is followed by IN_CLOSE_WRITE once written
+                changed.add(path)
+        return None if rescan else changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback without inotify: every wait() asks for a stat rescan."""
+
+    name = "polling"
+
+    def watch(self, directories: Iterable[Path]) -> None:
+        pass
+
+    def wait(self, timeout: Optional[float]) -> Optional[set]:
+        time.sleep(timeout)
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(backend: str = "auto"):
+    """InotifyWatcher if requested or available, else PollingWatcher."""
+    if backend == "polling":
+        return PollingWatcher()
+    if backend == "inotify" or InotifyWatcher.available():
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            if backend == "inotify":
+                raise
+    return PollingWatcher()
+
+
+def watch_batch(
+    directory: str,
+    concurrency: Optional[int] = None,
+    use_cache: bool = True,
+    on_event: Optional[Callable[[dict], None]] = None,
+    max_rounds: Optional[int] = None,
+) -> dict:
+    """
+    Generate outdated files, then keep regenerating files as they change.
+
+    The first round processes what a normal batch run would. After that
+    only files whose content hash changed are submitted, once no further
+    change has arrived for watch_debounce_ms.
+
+    Args:
+        directory: Directory to watch
+        concurrency: Generations kept in flight at once (defaults to
+            batch_concurrency from config)
+        use_cache: As for batch_generate
+        on_event: Called with each event: watching, changed, file (one
+            per finished file, with its result) and round
+        max_rounds: Stop after this many rounds with changes (after the
+            initial round); None watches until interrupted
+
+    Returns:
+        dict with rounds, processed and failed totals
+    """
+    try:
+        dir_path, config, concurrency = load_batch_settings(directory, concurrency)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    emit = on_event or (lambda event: None)
+    config["theme"] = resolve_theme_id(config) or ""
+    pattern = config.get("batch_pattern", "*_presentation.md")
+    max_depth = config.get("batch_max_depth", 0)
+    ignore = tuple(config.get("batch_ignore", DEFAULT_IGNORE))
+    debounce = float(config.get("watch_debounce_ms", 500)) / 1000
+    poll_interval = float(config.get("watch_poll_seconds", 2))
+
+    cache = ResultCache(
+        get_cache_path(),
+        max_entries=config.get("cache_max_entries", 1000),
+        max_age_days=config.get("cache_max_age_days", 90),
+    )
+    manifest = BatchManifest(get_manifest_path())
+    index = FileIndex()
+    results_index = open_results_index(config)
+    watcher = open_watcher(config.get("watch_backend", "auto"))
+    state = {"gitignore": None}
+
+    def rescan() -> set:
+        """Walk the tree, refresh watches and the index; return changed paths."""
+        gitignore = GitIgnore() if config.get("batch_gitignore", False) else None
+        directories = []
+        found = set(walk_candidates(dir_path, pattern, config, gitignore, directories))
+        state["gitignore"] = gitignore
+        watcher.watch(directories)
+        for path in index.paths():
+            if path not in found:
+                index.discard(path)
+        return {path for path in found if index.update(path)}
+
+    def tracked(path: Path) -> bool:
+        return path in index or is_candidate(
+            dir_path, path, pattern, ignore,
+            int(max_depth) if max_depth else None, state["gitignore"],
+        )
+
+    client = GammaAPIClient.from_config(config, pool_size=max(10, concurrency))
+    poller = StatusPoller(client, PollStrategy(get_timings_path()))
+    totals = {"rounds": 0, "processed": 0, "failed": 0}
+
+    def run_round(files: list[Path]) -> None:
+        start = time.monotonic()
+        emit({"event": "changed", "files": [str(f) for f in files]})
+
+        def report(result: dict) -> None:
+            if results_index is not None:
+                results_index.record_result(result)
+            emit({"event": "file", "result": result})
+
+        try:
+            results = run_threaded(
+                files, config, concurrency, cache, use_cache, manifest, report,
+                client, poller,
+            )
+        finally:
+            # Also on Ctrl-C mid-round: keep what the round already finished
+            cache.save()
+            manifest.compact()
+            if results_index is not None:
+                results_index.flush(force=True)
+        processed = len([r for r in results if r.get("success")])
+        totals["processed"] += processed
+        totals["failed"] += len(results) - processed
+        emit({
+            "event": "round",
+            "processed": processed,
+            "failed": len(results) - processed,
+            "seconds": round(time.monotonic() - start, 2),
+        })
+
+    try:
+        initial = sorted(rescan())
+        emit({
+            "event": "watching",
+            "directory": str(dir_path),
+            "backend": watcher.name,
+            "files": len(initial),
+        })
+        outdated = []
+        for md_file in initial:
+            if needs_processing(md_file, cache if use_cache else None, config):
+                outdated.append(md_file)
+            elif results_index is not None:
+                results_index.record_existing(md_file)
+        if outdated:
+            run_round(outdated)
+
+        pending = set()
+        quiet_since = time.monotonic()
+        while max_rounds is None or totals["rounds"] < max_rounds:
+            if pending:
+                timeout = max(0.0, quiet_since + debounce - time.monotonic())
+            elif watcher.name == "polling":
+                timeout = poll_interval
+            else:
+                timeout = None
+            events = watcher.wait(timeout)
+
+            if events is None:
+                changed = rescan()
+            else:
+                changed = {p for p in events if tracked(p) and index.update(p)}
+            if changed:
+                pending |= changed
+                quiet_since = time.monotonic()
+                continue
+
+            if pending and time.monotonic() - quiet_since >= debounce:
+                files = sorted(p for p in pending if p in index and not opted_out(p))
+                pending.clear()
+                if files:
+                    totals["rounds"] += 1
+                    run_round(files)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        poller.close()
+        watcher.close()
+        if results_index is not None:
+            results_index.close()
+
+    return {"success": totals["failed"] == 0, **totals}
@@ -0,0 +1,170 @@
+"""
+Linux audio backend detection for rt-voice.
+
+Which command-line players are installed is probed once with a PATH
+lookup (no player is ever launched to find out) and cached in
+~/.cache/rt-voice/backends.json. The cache is keyed by PATH and the
+modification times of the PATH directories and the players found, so
+installing or removing a player invalidates it; checking it costs one
+stat per PATH entry.
+
+Each backend's capabilities (formats it can play and how it takes a
+volume) come from CAPABILITIES, so every event goes straight to a
+player that can handle the file.
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+CACHE_VERSION = 1
+
+# Player -> formats it plays, how volume (0.0-1.0) is passed and the
+# arguments that make it read the file from stdin (None if it cannot),
+# in order of preference. Players with a volume control come first.
+CAPABILITIES = {
+    "mpg123": {
+        "formats": (".mp3",),
+        # -f: output scale factor, 32768 = unchanged
+        "volume": lambda v: ["-f", str(int(32768 * v))],
+        "command": ["mpg123", "-q"],
+        "stdin": None,
+    },
+    "pw-play": {
+        "formats": (".wav", ".ogg"),
+        "volume": lambda v: ["--volume", f"{v:.2f}"],
+        "command": ["pw-play"],
+        "stdin": ["-"],
+    },
+    "paplay": {
+        "formats": (".wav", ".ogg"),
+        # 65536 = 100%
+        "volume": lambda v: ["--volume", str(int(65536 * v))],
+        "command": ["paplay"],
+        "stdin": [],
+    },
+    "ffplay": {
+        "formats": (".mp3", ".wav", ".ogg"),
+        "volume": lambda v: ["-volume", str(int(100 * v))],
+        "command": ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"],
+        "stdin": ["-i", "pipe:0"],
+    },
+    "aplay": {
+        "formats": (".wav",),
+        "volume": None,
+        "command": ["aplay", "-q"],
+        "stdin": [],
+    },
+}
+
+
+def cache_dir():
+    """rt-voice's cache folder: $XDG_CACHE_HOME/rt-voice or ~/.cache/rt-voice."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "rt-voice"
+
+
+def cache_path():
+    return cache_dir() / "backends.json"
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _path_stamp(path_env):
+    """PATH plus the mtime of each of its directories."""
+    dirs = [d for d in path_env.split(os.pathsep) if d]
+    return {"path": path_env, "dirs": [_mtime(d) for d in dirs]}
+
+
+def _probe(path_env):
+    """Find each known player on path_env. Returns {name: absolute path}."""
+    found = {}
+    for name in CAPABILITIES:
+        location = shutil.which(name, path=path_env)
+        if location:
+            found[name] = location
+    return found
+
+
+def detect_backends(path_env=None):
+    """
+    Return installed players as {name: absolute path}, from the cache
+    when PATH, its directories and the players are unchanged.
+    """
+    if path_env is None:
+        path_env = os.environ.get("PATH", "")
+    stamp = _path_stamp(path_env)
+    cache_file = cache_path()
+
+    try:
+        cached = json.loads(cache_file.read_text(encoding="utf-8"))
+        if (
+            cached.get("version") == CACHE_VERSION
+            and cached.get("stamp") == stamp
+            and all(_mtime(p) == m for p, m in cached.get("binaries", []))
+        ):
+            return dict(cached["players"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+    players = _probe(path_env)
+    data = {
+        "version": CACHE_VERSION,
+        "stamp": stamp,
+        "binaries": [[p, _mtime(p)] for p in players.values()],
+        "players": players,
+    }
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(str(tmp_path), str(cache_file))
+    except OSError:
+        pass
+    return players
+
+
+def player_command(path, volume=0.8, players=None, stdin=False):
+    """
+    Build the command line that plays path at volume, or None if no
+    installed player handles its format.
+
+    Prefers the first player in CAPABILITIES that supports the format.
+    With stdin=True only players that can read the file from stdin are
+    considered, and the command expects the file there instead of path.
+    """
+    if players is None:
+        players = detect_backends()
+    suffix = Path(path).suffix.lower()
+    for name, caps in CAPABILITIES.items():
+        if name not in players or suffix not in caps["formats"]:
+            continue
+        if stdin and caps["stdin"] is None:
+            continue
+        command = [players[name]] + caps["command"][1:]
+        if caps["volume"] is not None:
+            command += caps["volume"](volume)
+        return command + (caps["stdin"] if stdin else [str(path)])
+    return None
+
+
+def main():
+    """Print the detected players and what each can play."""
+    players = detect_backends()
+    print(json.dumps({
+        name: {
+            "path": players[name],
+            "formats": list(caps["formats"]),
+            "volume": caps["volume"] is not None,
+        }
+        for name, caps in CAPABILITIES.items() if name in players
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
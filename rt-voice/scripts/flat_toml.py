@@ -0,0 +1,153 @@
+"""
+Minimal TOML reader for Pythons without tomllib or tomli.
+
+The rt plugins no longer pip-install tomli at runtime, and rt-voice
+hooks run on whatever Python 3.8+ is on the PATH, so project_config
+falls back to this parser to read flat config files. Like
+project_config, it is vendored unchanged into each plugin's scripts/
+folder (rt-gamma and rt-voice); keep the copies identical.
+"""
+import json
+import re
+
+
+def load(f) -> dict:
+    """Parse a TOML document from a binary file object."""
+    return loads(f.read().decode("utf-8"))
+
+
+def loads(text: str) -> dict:
+    """
+    Parse a TOML document.
+
+    Raises:
+        ValueError: If the text uses TOML features this parser does not
+            handle, or is not valid TOML
+    """
+    return _FlatToml(text).document()
+
+
+class _FlatToml:
+    """
+    Fallback for top-level `key = value` TOML without tables.
+
+    Handles what the rt config files use: basic and literal strings,
+    integers, floats, booleans and (possibly multi-line) arrays of those,
+    plus comments. Anything else raises ValueError naming the line, with
+    a hint to install tomli.
+    """
+
+    _BARE_KEY = re.compile(r"[A-Za-z0-9_-]+")
+    _SCALAR = re.compile(r"[^\s,\]#]+")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def error(self, message: str) -> ValueError:
+        line = self.text.count("\n", 0, self.pos) + 1
+        return ValueError(
+            f"line {line}: {message} (install tomli or use Python 3.11+ for full TOML)"
+        )
+
+    def skip(self, newlines: bool) -> None:
+        """Skip spaces, comments and, if newlines is True, line breaks."""
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char in " \t\r" or (newlines and char == "\n"):
+                self.pos += 1
+            elif char == "#":
+                end = self.text.find("\n", self.pos)
+                self.pos = len(self.text) if end < 0 else end
+            else:
+                return
+
+    def document(self) -> dict:
+        data = {}
+        while True:
+            self.skip(newlines=True)
+            if self.pos >= len(self.text):
+                return data
+            if self.text[self.pos] == "[":
+                raise self.error("tables are not supported")
+            key = self.key()
+            self.skip(newlines=False)
+            if not self.text.startswith("=", self.pos):
+                raise self.error(f"expected '=' after {key!r}")
+            self.pos += 1
+            self.skip(newlines=False)
+            data[key] = self.value()
+            self.skip(newlines=False)
+            if self.pos < len(self.text) and self.text[self.pos] != "\n":
+                raise self.error("unexpected text after value")
+
+    def key(self) -> str:
+        if self.text[self.pos] in "\"'":
+            return self.string()
+        match = self._BARE_KEY.match(self.text, self.pos)
+        if not match:
+            raise self.error("invalid key")
+        self.pos = match.end()
+        if self.text.startswith(".", self.pos):
+            raise self.error("dotted keys are not supported")
+        return match.group()
+
+    def value(self):
+        if self.pos >= len(self.text):
+            raise self.error("missing value")
+        char = self.text[self.pos]
+        if char in "\"'":
+            return self.string()
+        if char == "[":
+            return self.array()
+        match = self._SCALAR.match(self.text, self.pos)
+        if not match:
+            raise self.error("missing value")
+        self.pos = match.end()
+        token = match.group()
+        if token in ("true", "false"):
+            return token == "true"
+        try:
+            return int(token.replace("_", ""), 0)
+        except ValueError:
+            pass
+        try:
+            return float(token.replace("_", ""))
+        except ValueError:
+            raise self.error(f"unsupported value {token!r}")
+
+    def string(self) -> str:
+        quote = self.text[self.pos]
+        if self.text.startswith(quote * 3, self.pos):
+            raise self.error("multi-line strings are not supported")
+        end = self.pos + 1
+        while end < len(self.text) and self.text[end] != quote:
+            if self.text[end] == "\n":
+                raise self.error("unterminated string")
+            end += 2 if quote == '"' and self.text[end] == "\\" else 1
+        if end >= len(self.text):
+            raise self.error("unterminated string")
+        raw = self.text[self.pos:end + 1]
+        self.pos = end + 1
+        if quote == "'":
+            return raw[1:-1]
+        try:
+            # TOML basic-string escapes are a subset of JSON's
+            return json.loads(raw)
+        except ValueError:
+            raise self.error("invalid escape in string")
+
+    def array(self) -> list:
+        self.pos += 1
+        items = []
+        while True:
+            self.skip(newlines=True)
+            if self.text.startswith("]", self.pos):
+                self.pos += 1
+                return items
+            items.append(self.value())
+            self.skip(newlines=True)
+            if self.text.startswith(",", self.pos):
+                self.pos += 1
+            elif not self.text.startswith("]", self.pos):
+                raise self.error("expected ',' or ']' in array")
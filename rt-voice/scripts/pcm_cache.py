@@ -0,0 +1,254 @@
+"""
+Pre-decoded PCM cache for rt-voice.
+
+Each clip is decoded once to 16-bit PCM, peak-normalized (optional) and
+scaled by the configured volume, then stored as a WAV file in
+~/.cache/rt-voice/pcm/. Later events play that file as is: nothing is
+decoded, and since the volume is baked into the samples it sounds the
+same whichever player ends up playing it, including players without a
+volume control such as aplay.
+
+Decoding uses the first available of afconvert (macOS), ffmpeg and,
+for MP3, mpg123. 16-bit WAV clips need no decoder. Without one, the
+caller falls back to playing the original file.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from array import array
+from pathlib import Path
+
+from backends import cache_dir
+
+CACHE_VERSION = 2
+
+# Normalized clips peak at this fraction of full scale (about -1 dBFS)
+NORMALIZE_PEAK = 0.89
+
+# Seconds a decoder may take before the clip is played undecoded
+DECODE_TIMEOUT = 30
+
+
+def pcm_dir():
+    return cache_dir() / "pcm"
+
+
+def _entry_names(source, volume, normalize):
+    """
+    Cache file names for source at these settings: (WAV entry, failure marker).
+
+    Names are "<path>-<source version>-<settings>.wav", each part a
+    short hash. The path part finds every entry for the clip; the source
+    version (mtime and size) tells which ones an edited file made stale,
+    without touching entries for other volumes. A clip that failed to
+    decode gets a "<path>-<source version>.failed" marker instead.
+    """
+    stat = os.stat(str(source))
+    prefix = _short_hash(str(source), 16)
+    version = _short_hash(f"{CACHE_VERSION}:{stat.st_mtime_ns}:{stat.st_size}", 8)
+    settings = _short_hash(f"{volume:.3f}:{int(bool(normalize))}", 8)
+    return f"{prefix}-{version}-{settings}.wav", f"{prefix}-{version}.failed"
+
+
+def _short_hash(text, length):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:length]
+
+
+def cached_wav(source, volume=0.8, normalize=True, create=True):
+    """
+    Return the path of a WAV file holding source, decoded with volume
+    (and normalization) applied, creating it on first use.
+
+    With create=False only an existing entry is returned; nothing is
+    decoded, so the lookup costs a stat or two. A clip that failed to
+    decode is not retried until the file changes.
+
+    Returns None if the clip is not cached (create=False) or cannot be
+    decoded here; the caller should then play source directly.
+    """
+    source = Path(source).resolve()
+    try:
+        name, failed = _entry_names(source, volume, normalize)
+    except OSError:
+        return None
+    target = pcm_dir() / name
+    if target.exists():
+        return target
+    if not create or (target.parent / failed).exists():
+        return None
+
+    try:
+        params, frames = _decode(source)
+    except (OSError, EOFError, wave.Error, subprocess.SubprocessError):
+        params = None
+    if params is None:
+        _mark_failed(target.parent / failed)
+        return None
+
+    frames = apply_gain(frames, volume, normalize)
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with wave.open(str(tmp_path), "wb") as out:
+            out.setnchannels(params.nchannels)
+            out.setsampwidth(2)
+            out.setframerate(params.framerate)
+            out.writeframes(frames)
+        os.replace(str(tmp_path), str(target))
+    except (OSError, wave.Error):
+        return None
+
+    _remove_stale(target)
+    return target
+
+
+def decode_failed(source):
+    """True if source failed to decode and has not changed since."""
+    try:
+        _, failed = _entry_names(Path(source).resolve(), 0.0, False)
+    except OSError:
+        return False
+    return (pcm_dir() / failed).exists()
+
+
+def _mark_failed(marker):
+    """Record that a clip cannot be decoded, so later events skip it."""
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+    except OSError:
+        return
+    _remove_stale(marker)
+
+
+def _remove_stale(current):
+    """Remove entries and markers for older versions of current's clip."""
+    prefix, version = current.name.split("-")[:2]
+    version = version.split(".")[0]
+    for path in current.parent.glob(f"{prefix}-*"):
+        if path.suffix not in (".wav", ".failed"):
+            continue
+        if path.stem.split("-")[1:2] != [version]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def fill_detached(source, volume=0.8, normalize=True):
+    """
+    Create the cache entry for source in a detached copy of this script,
+    so a hook that missed the cache can play the original file and exit
+    without waiting for the decoder. Does nothing for a clip that
+    already failed to decode.
+    """
+    if decode_failed(source):
+        return
+    kwargs = {}
+    if sys.platform in ("win32", "msys"):
+        kwargs["creationflags"] = (
+            getattr(subprocess, "DETACHED_PROCESS", 0x8)
+            | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0x200)
+            | getattr(subprocess, "CREATE_NO_WINDOW", 0x8000000)
+        )
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()),
+             str(source), str(volume), str(int(bool(normalize)))],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            **kwargs,
+        )
+    except OSError:
+        pass
+
+
+def _decode(source):
+    """
+    Decode source to 16-bit PCM. Returns (wave params, frame bytes), or
+    (None, None) if no decoder is available.
+    """
+    if source.suffix.lower() == ".wav":
+        with wave.open(str(source), "rb") as f:
+            if f.getsampwidth() == 2:
+                return f.getparams(), f.readframes(f.getnframes())
+
+    fd, tmp_name = tempfile.mkstemp(suffix=".wav", prefix="rt-voice-")
+    os.close(fd)
+    try:
+        for cmd in _decoder_commands(source, tmp_name):
+            try:
+                result = subprocess.run(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=DECODE_TIMEOUT,
+                    check=False,
+                )
+            except subprocess.TimeoutExpired:
+                continue
+            if result.returncode != 0 or os.path.getsize(tmp_name) == 0:
+                continue
+            with wave.open(tmp_name, "rb") as f:
+                if f.getsampwidth() != 2:
+                    continue
+                return f.getparams(), f.readframes(f.getnframes())
+        return None, None
+    finally:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+
+
+def _decoder_commands(source, output):
+    """Installed decoders for source, each writing a 16-bit WAV to output."""
+    source = str(source)
+    commands = []
+    if sys.platform == "darwin":
+        commands.append(["afconvert", "-f", "WAVE", "-d", "LEI16", source, output])
+    commands.append(["ffmpeg", "-v", "quiet", "-y", "-i", source, "-acodec", "pcm_s16le", output])
+    if source.lower().endswith(".mp3"):
+        commands.append(["mpg123", "-q", "-w", output, source])
+    return [cmd for cmd in commands if shutil.which(cmd[0])]
+
+
+def apply_gain(frames, volume, normalize=True):
+    """
+    Scale 16-bit little-endian PCM by volume, after peak-normalizing it
+    to NORMALIZE_PEAK if normalize is set. Returns the new frame bytes.
+    """
+    samples = array("h")
+    samples.frombytes(frames)
+    if sys.byteorder == "big":
+        samples.byteswap()
+
+    peak = max(max(samples), -min(samples)) if samples else 0
+    gain = float(volume)
+    if normalize and peak:
+        gain *= NORMALIZE_PEAK * 32767 / peak
+
+    if gain != 1.0 and samples:
+        if peak * gain <= 32767:
+            samples = array("h", [int(s * gain) for s in samples])
+        else:
+            samples = array("h", [max(-32768, min(32767, int(s * gain))) for s in samples])
+
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes()
+
+
+if __name__ == "__main__":
+    # Background fill started by fill_detached
+    if len(sys.argv) == 4:
+        cached_wav(sys.argv[1], float(sys.argv[2]), sys.argv[3] == "1")
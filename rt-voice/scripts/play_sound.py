@@ -6,7 +6,10 @@ Usage: python play_sound.py <event_name>
 No third-party dependencies required. Uses native OS audio playback:
   - Windows: winmm.dll (mciSendString) via ctypes
   - macOS: afplay
-  - Linux: mpg123 or ffplay
+  - Linux: mpg123, pw-play, paplay, ffplay or aplay (see backends.py)
+
+With `daemon = true` in the config, events are handed to a background
+playback daemon (voice_daemon.py) instead of being played here.
 """
 
 import sys
@@ -19,57 +22,78 @@ import random
 import subprocess
 from pathlib import Path
 
-# Python 3.11+ has tomllib built-in
-try:
-    import tomllib
-except ImportError:
-    try:
-        import tomli as tomllib
-    except ImportError:
-        tomllib = None
-
-SUPPORTED_FORMATS = (".mp3", ".wav", ".ogg")
+from project_config import find_project_root, load_toml
+from theme_index import event_sounds
 
 
-def get_config():
-    """Load config from .claude/rt-voice.toml or return defaults."""
-    config_path = Path.cwd() / ".claude" / "rt-voice.toml"
-    defaults = {"enabled": True, "theme": "default", "volume": 0.8}
+def get_config(root=None):
+    """Load config from .claude/rt-voice.toml in the project root, or return defaults."""
+    config_path = (root or find_project_root()) / ".claude" / "rt-voice.toml"
+    defaults = {
+        "enabled": True,
+        "theme": "default",
+        "volume": 0.8,
+        "blocking": False,
+        "daemon": False,
+        "pcm_cache": True,
+        "normalize": True,
+    }
 
-    if config_path.exists() and tomllib:
-        with open(config_path, "rb") as f:
-            user_config = tomllib.load(f)
-        return {**defaults, **user_config}
-    return defaults
+    try:
+        user_config = load_toml(config_path)
+    except (OSError, ValueError):
+        # Missing or unreadable file, or TOML the parser could not read
+        return defaults
+    return {**defaults, **user_config}
 
 
 def find_sound(plugin_root, theme, event):
     """Find sound file or folder for an event. Returns path or None."""
-    theme_dir = plugin_root / "themes" / theme
-
-    # Check for folder first (random selection)
-    event_folder = theme_dir / event
-    if event_folder.is_dir():
-        sounds = [
-            f for f in event_folder.iterdir()
-            if f.suffix.lower() in SUPPORTED_FORMATS
-        ]
-        return random.choice(sounds) if sounds else None
-
-    # Check for single file
-    for ext in SUPPORTED_FORMATS:
-        sound_file = theme_dir / f"{event}{ext}"
-        if sound_file.exists():
-            return sound_file
-
-    return None
-
-
-def play_sound(path, volume=0.8):
-    """Play sound using native OS audio. No third-party dependencies needed."""
+    sounds = theme_sounds(plugin_root, theme, event)
+    return random.choice(sounds) if sounds else None
+
+
+def theme_sounds(plugin_root, theme, event, memo=None):
+    """
+    All sounds an event can play: the files in its folder, or its single
+    file. Looked up in the theme's index (see theme_index.py).
+    """
+    return event_sounds(plugin_root / "themes" / theme, event, memo)
+
+
+def play_sound(path, volume=0.8, blocking=True, pcm_cache=True, normalize=True):
+    """
+    Play sound using native OS audio. No third-party dependencies needed.
+
+    With pcm_cache the clip is decoded once into the PCM cache with
+    volume (and, with normalize, peak normalization) applied, and that
+    WAV is played at full scale, so volume sounds the same with every
+    player (see pcm_cache.py). Clips that cannot be decoded play as is.
+    Without blocking, a clip that is not cached yet plays as is while a
+    detached process decodes it for later events.
+
+    With blocking=False the player is started in its own session (on
+    Windows, a detached copy of this script plays the file) and this
+    returns immediately.
+    """
+    if pcm_cache:
+        from pcm_cache import cached_wav, fill_detached
+        wav = cached_wav(path, volume, normalize, create=blocking)
+        if wav is not None:
+            path, volume = wav, 1.0
+        elif not blocking:
+            fill_detached(path, volume, normalize)
     path_str = str(path)
 
     if sys.platform in ("win32", "msys"):
+        if not blocking:
+            _play_detached_windows(path_str, volume)
+            return
+        if volume >= 1.0 and path_str.lower().endswith(".wav"):
+            # Nothing to scale, so winsound can play it directly
+            import winsound
+            winsound.PlaySound(path_str, winsound.SND_FILENAME | winsound.SND_NODEFAULT)
+            return
         import ctypes
         winmm = ctypes.windll.winmm
         # Get 8.3 short path to avoid issues with special chars in filenames
@@ -83,40 +107,118 @@ def play_sound(path, volume=0.8):
         winmm.mciSendStringW("close rtv", None, 0, None)
 
     elif sys.platform == "darwin":
-        subprocess.run(
-            ["afplay", "-v", str(volume), path_str],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False,
-        )
+        _run_player(["afplay", "-v", str(volume), path_str], blocking)
 
     else:
-        # Linux: try common CLI players
-        for cmd in (
-            ["mpg123", "-q", path_str],
-            ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet",
-             "-volume", str(int(volume * 100)), path_str],
-            ["aplay", path_str],
-        ):
-            try:
-                subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        # Linux: the first installed player that handles this format,
+        # from the cached backend probe
+        from backends import player_command
+        if blocking:
+            cmd = player_command(path_str, volume, stdin=True)
+            if cmd is not None:
+                _stream_player(cmd, path_str)
                 return
-            except Exception:
-                continue
+        cmd = player_command(path_str, volume)
+        if cmd is not None:
+            _run_player(cmd, blocking)
+
+
+def _run_player(cmd, blocking):
+    """
+    Run a player command. Returns True if it played (blocking) or started.
+
+    Raises OSError if the player is not installed.
+    """
+    if blocking:
+        return subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False,
+        ).returncode == 0
+    # Own session: the player outlives the hook process and is not
+    # killed along with the hook's process group
+    subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    return True
+
+
+def _stream_player(cmd, path_str):
+    """
+    Run a player that reads from stdin and write path_str to it through
+    a memory map, so the clip goes from the page cache to the player
+    without being copied into this process first.
+    """
+    import mmap
+    with open(path_str, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        player = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            player.stdin.write(data)
+            player.stdin.close()
+        except BrokenPipeError:
+            pass
+        return player.wait() == 0
+
+
+def _play_detached_windows(path_str, volume):
+    """Re-run this script detached to play path_str, so the hook can exit."""
+    # pythonw avoids flashing a console window
+    executable = Path(sys.executable)
+    pythonw = executable.with_name("pythonw.exe")
+    if pythonw.exists():
+        executable = pythonw
+    flags = (
+        getattr(subprocess, "DETACHED_PROCESS", 0x8)
+        | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0x200)
+        | getattr(subprocess, "CREATE_NO_WINDOW", 0x8000000)
+    )
+    subprocess.Popen(
+        [str(executable), str(Path(__file__).resolve()), "--play", path_str, str(volume)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        creationflags=flags,
+        close_fds=True,
+    )
 
 
 def main():
     if len(sys.argv) < 2:
         return
 
+    if sys.argv[1] == "--play" and len(sys.argv) == 4:
+        # Detached playback started by _play_detached_windows, which has
+        # already resolved the clip through the PCM cache
+        play_sound(sys.argv[2], float(sys.argv[3]), pcm_cache=False)
+        return
+
     event = sys.argv[1]
     plugin_root = Path(__file__).parent.parent
-    config = get_config()
+    root = find_project_root()
+    config = get_config(root)
 
     if not config["enabled"]:
         return
 
+    if config["daemon"]:
+        # Hand the event to the playback daemon and return immediately
+        from voice_daemon import notify
+        if notify(event, root):
+            return
+
     sound_path = find_sound(plugin_root, config["theme"], event)
     if sound_path:
-        play_sound(sound_path, config["volume"])
+        play_sound(
+            sound_path,
+            config["volume"],
+            blocking=config["blocking"],
+            pcm_cache=config["pcm_cache"],
+            normalize=config["normalize"],
+        )
 
 
 if __name__ == "__main__":
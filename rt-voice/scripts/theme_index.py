@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Compiled sound index for rt-voice themes.
+
+Scanning a theme on every hook means listing the event folder and
+probing each supported extension. Instead, each theme is scanned once
+into a small JSON manifest (event -> sounds with format and duration)
+stored in ~/.cache/rt-voice/themes/. A lookup reads that one file, or
+hits the in-memory copy in the playback daemon, and checks the
+modification time of the theme folder and the event's folder; the
+index is rebuilt when either has changed, i.e. when sounds or event
+folders are added, removed or renamed.
+
+Usage: theme_index.py --reindex [theme ...]
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+import wave
+from pathlib import Path
+
+from backends import cache_dir
+
+SUPPORTED_FORMATS = (".mp3", ".wav", ".ogg")
+
+INDEX_VERSION = 1
+
+
+def index_path(theme_dir):
+    """Cache file holding the index for theme_dir."""
+    theme_dir = Path(theme_dir).resolve()
+    digest = hashlib.sha1(str(theme_dir).encode("utf-8")).hexdigest()[:12]
+    return cache_dir() / "themes" / f"{theme_dir.name}-{digest}.json"
+
+
+def _mtime(path):
+    try:
+        return os.stat(str(path)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def build_index(theme_dir):
+    """
+    Scan theme_dir into an index dict.
+
+    An event folder wins over a single `<event>.<ext>` file, and among
+    single files the first extension in SUPPORTED_FORMATS wins, as
+    before the index existed.
+    """
+    theme_dir = Path(theme_dir)
+    events = {}
+    singles = {}
+    try:
+        entries = sorted(theme_dir.iterdir())
+    except OSError:
+        entries = []
+
+    for entry in entries:
+        if entry.is_dir():
+            sounds = [
+                _sound_entry(f, f.name)
+                for f in sorted(entry.iterdir())
+                if f.suffix.lower() in SUPPORTED_FORMATS and f.is_file()
+            ]
+            events[entry.name] = {"mtime": _mtime(entry), "sounds": sounds}
+        elif entry.suffix.lower() in SUPPORTED_FORMATS:
+            singles.setdefault(entry.stem, []).append(entry)
+
+    for event, files in singles.items():
+        if event in events:
+            continue
+        files.sort(key=lambda f: SUPPORTED_FORMATS.index(f.suffix.lower()))
+        events[event] = {"mtime": None, "sounds": [_sound_entry(files[0], files[0].name)]}
+
+    return {
+        "version": INDEX_VERSION,
+        "theme_dir": str(theme_dir.resolve()),
+        "mtime": _mtime(theme_dir),
+        "events": events,
+    }
+
+
+def _sound_entry(path, relative):
+    """Index entry for one sound: path relative to its parent, format and duration."""
+    return {
+        "file": relative,
+        "format": path.suffix.lower().lstrip("."),
+        "duration": sound_duration(path),
+    }
+
+
+def write_index(theme_dir, index):
+    """Write index to the cache atomically. Errors are ignored."""
+    path = index_path(theme_dir)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(str(tmp_path), str(path))
+    except OSError:
+        pass
+
+
+def reindex(theme_dir):
+    """Rebuild and store the index for theme_dir. Returns the index."""
+    index = build_index(theme_dir)
+    write_index(theme_dir, index)
+    return index
+
+
+def _fresh(index, theme_dir, event):
+    """True if index is current for theme_dir and event."""
+    if index.get("version") != INDEX_VERSION or index.get("mtime") != _mtime(theme_dir):
+        return False
+    entry = index["events"].get(event)
+    return entry is None or entry["mtime"] is None or entry["mtime"] == _mtime(theme_dir / event)
+
+
+def load_index(theme_dir, event=None, memo=None):
+    """
+    Return the index for theme_dir, rebuilding it if it is out of date.
+
+    Args:
+        theme_dir: Theme folder
+        event: Event about to be looked up; its folder's mtime is checked
+            along with the theme folder's
+        memo: Optional dict kept by a long-lived caller to hold indexes
+            in memory between lookups
+    """
+    theme_dir = Path(theme_dir)
+    key = str(theme_dir)
+    index = memo.get(key) if memo is not None else None
+
+    if index is None:
+        try:
+            index = json.loads(index_path(theme_dir).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            index = None
+
+    try:
+        fresh = index is not None and _fresh(index, theme_dir, event)
+    except (KeyError, TypeError, AttributeError):
+        fresh = False
+    if not fresh:
+        index = reindex(theme_dir)
+
+    if memo is not None:
+        memo[key] = index
+    return index
+
+
+def event_sounds(theme_dir, event, memo=None):
+    """All sound paths an event can play, from the theme's index."""
+    theme_dir = Path(theme_dir)
+    entry = load_index(theme_dir, event, memo)["events"].get(event)
+    if entry is None:
+        return []
+    base = theme_dir / event if entry["mtime"] is not None else theme_dir
+    return [base / sound["file"] for sound in entry["sounds"]]
+
+
+def sound_duration(path):
+    """
+    Duration of a sound file in seconds, or None if it cannot be read.
+
+    Reads only headers (and, for MP3 without a frame count, estimates
+    from the bitrate), so indexing a theme stays fast.
+    """
+    suffix = Path(path).suffix.lower()
+    try:
+        if suffix == ".wav":
+            with wave.open(str(path), "rb") as f:
+                return round(f.getnframes() / float(f.getframerate()), 3)
+        if suffix == ".mp3":
+            return _mp3_duration(path)
+        if suffix == ".ogg":
+            return _ogg_duration(path)
+    except (OSError, EOFError, ValueError, ZeroDivisionError, struct.error, wave.Error):
+        return None
+    return None
+
+
+# MPEG audio bitrates (kbit/s) for layer III, by version
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _mp3_duration(path):
+    size = os.path.getsize(str(path))
+    with open(str(path), "rb") as f:
+        head = f.read(64 * 1024)
+
+    offset = 0
+    if head[:3] == b"ID3":
+        # ID3v2 tag size is a 28-bit syncsafe integer
+        tag = head[6:10]
+        offset = 10 + ((tag[0] << 21) | (tag[1] << 14) | (tag[2] << 7) | tag[3])
+        if offset + 4 > len(head):
+            with open(str(path), "rb") as f:
+                f.seek(offset)
+                head = b"\0" * offset + f.read(64 * 1024)
+
+    while offset + 4 <= len(head):
+        if head[offset] == 0xFF and head[offset + 1] & 0xE0 == 0xE0:
+            header = struct.unpack(">I", head[offset:offset + 4])[0]
+            version_bits = (header >> 19) & 3
+            layer_bits = (header >> 17) & 3
+            bitrate_index = (header >> 12) & 15
+            rate_index = (header >> 10) & 3
+            if (version_bits != 1 and layer_bits == 1
+                    and 0 < bitrate_index < 15 and rate_index < 3):
+                break
+        offset += 1
+    else:
+        return None
+
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    mpeg1 = version_bits == 3
+    samples_per_frame = 1152 if mpeg1 else 576
+    channel_mode = (header >> 6) & 3
+
+    # Xing/Info header (VBR and LAME CBR files) carries the frame count
+    side_info = (32 if channel_mode != 3 else 17) if mpeg1 else (17 if channel_mode != 3 else 9)
+    xing = offset + 4 + side_info
+    if head[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", head[xing + 4:xing + 8])[0]
+        if flags & 1:
+            frames = struct.unpack(">I", head[xing + 8:xing + 12])[0]
+            return round(frames * samples_per_frame / float(sample_rate), 3)
+
+    bitrate = _MP3_BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    return round((size - offset) * 8 / float(bitrate), 3)
+
+
+def _ogg_duration(path):
+    with open(str(path), "rb") as f:
+        head = f.read(4096)
+        # Vorbis identification header: sample rate follows version and channels
+        start = head.find(b"\x01vorbis")
+        if start < 0:
+            return None
+        sample_rate = struct.unpack("<I", head[start + 12:start + 16])[0]
+
+        # Granule position of the last page is the total sample count
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 64 * 1024))
+        tail = f.read()
+    last = tail.rfind(b"OggS")
+    if last < 0 or last + 14 > len(tail):
+        return None
+    granule = struct.unpack("<q", tail[last + 6:last + 14])[0]
+    return round(granule / float(sample_rate), 3)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "--reindex":
+        print("Usage: theme_index.py --reindex [theme ...]")
+        sys.exit(1)
+
+    themes_dir = Path(__file__).resolve().parent.parent / "themes"
+    names = sys.argv[2:] or sorted(d.name for d in themes_dir.iterdir() if d.is_dir())
+    for name in names:
+        theme_dir = themes_dir / name
+        if not theme_dir.is_dir():
+            print(f"{name}: no such theme in {themes_dir}")
+            continue
+        index = reindex(theme_dir)
+        sounds = sum(len(e["sounds"]) for e in index["events"].values())
+        print(f"{name}: {len(index['events'])} events, {sounds} sounds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+rt-voice playback daemon.
+
+A long-lived process that receives hook events over a Unix datagram
+socket and plays them, so each hook costs one sendto() instead of a
+Python start-up, a config parse, a theme scan and a blocking player
+run. It is started on the first event by play_sound.py when `daemon =
+true` is set, holds config and sound lookups in memory, and exits after
+IDLE_TIMEOUT seconds without events.
+
+One daemon serves every project of the current user: each event carries
+its project root, and that project's config is re-read only when the
+file changes.
+
+Usage: voice_daemon.py serve | stop
+"""
+import json
+import os
+import queue
+import random
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Seconds without events before the daemon exits
+IDLE_TIMEOUT = 30 * 60
+# Events waiting to play; later ones are dropped rather than played late
+MAX_PENDING = 2
+# How long a client waits for a freshly started daemon to bind its socket
+START_TIMEOUT = 2.0
+
+
+def supported():
+    """True where Unix datagram sockets are available."""
+    return hasattr(socket, "AF_UNIX") and sys.platform not in ("win32", "msys")
+
+
+def socket_path():
+    """
+    Per-user socket in XDG_RUNTIME_DIR, or else in a private rt-voice-<uid>
+    folder in the temp dir (never the shared temp dir itself).
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        return Path(base) / "rt-voice-{}.sock".format(os.getuid())
+    return Path(tempfile.gettempdir()) / "rt-voice-{}".format(os.getuid()) / "rt-voice.sock"
+
+
+def _private_dir(directory):
+    """
+    Create directory (mode 0700) if needed. Returns True if only this
+    user can use it: not a symlink, owned by us, closed to others.
+    Otherwise someone else could receive our events (which carry project
+    paths) or hold the socket path.
+    """
+    try:
+        directory.mkdir(mode=0o700, exist_ok=True)
+        info = os.lstat(str(directory))
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(info.st_mode)
+        and info.st_uid == os.getuid()
+        and not info.st_mode & 0o077
+    )
+
+
+def _send(message):
+    """Send one datagram. Raises OSError if no daemon is listening."""
+    path = socket_path()
+    if not _private_dir(path.parent):
+        raise PermissionError("rt-voice socket folder is not private: {}".format(path.parent))
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        client.sendto(json.dumps(message).encode("utf-8"), str(path))
+    finally:
+        client.close()
+
+
+def notify(event, root):
+    """
+    Hand an event to the daemon, starting it if needed.
+
+    Returns immediately after the datagram is queued; playback happens
+    in the daemon. Returns False if the daemon could not be reached, so
+    the caller can play the sound itself.
+    """
+    if not supported() or not _private_dir(socket_path().parent):
+        return False
+    message = {"op": "play", "event": event, "root": str(root)}
+    try:
+        _send(message)
+        return True
+    except OSError:
+        pass
+
+    start_daemon()
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        try:
+            _send(message)
+            return True
+        except OSError:
+            continue
+    return False
+
+
+def start_daemon():
+    """Start a detached daemon process."""
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "serve"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+
+
+class PlaybackDaemon:
+    """Receive events on a datagram socket and play them on a worker thread."""
+
+    def __init__(self, path, idle_timeout=IDLE_TIMEOUT):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.plugin_root = Path(__file__).resolve().parent.parent
+        self.pending = queue.Queue(maxsize=MAX_PENDING)
+        self.last_event = time.monotonic()
+        # Theme indexes held in memory (see theme_index.load_index)
+        self._themes = {}
+        self.sock = None
+
+    def bind(self):
+        """
+        Bind the socket. Returns False if another daemon already owns it,
+        or its folder is not private to this user.
+
+        A socket file left behind by a daemon that died is replaced.
+        """
+        if not _private_dir(self.path.parent):
+            return False
+        if self.path.exists():
+            try:
+                _send({"op": "ping"})
+                return False
+            except OSError:
+                self.path.unlink()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        old_umask = os.umask(0o177)
+        try:
+            self.sock.bind(str(self.path))
+        finally:
+            os.umask(old_umask)
+        return True
+
+    def serve(self):
+        threading.Thread(target=self._play_loop, daemon=True).start()
+        self.sock.settimeout(60)
+        try:
+            while time.monotonic() - self.last_event < self.idle_timeout:
+                try:
+                    data = self.sock.recv(65536)
+                except socket.timeout:
+                    continue
+                try:
+                    message = json.loads(data.decode("utf-8"))
+                except ValueError:
+                    continue
+                op = message.get("op")
+                if op == "stop":
+                    break
+                if op == "play":
+                    self.last_event = time.monotonic()
+                    try:
+                        self.pending.put_nowait(message)
+                    except queue.Full:
+                        pass
+        finally:
+            self.sock.close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def _play_loop(self):
+        from play_sound import get_config, play_sound
+
+        while True:
+            message = self.pending.get()
+            try:
+                config = get_config(Path(message["root"]))
+                if not config["enabled"]:
+                    continue
+                sound = self.find_sound(config["theme"], message["event"])
+                if sound is not None:
+                    # Blocking here keeps the daemon to one sound at a time
+                    play_sound(
+                        sound,
+                        config["volume"],
+                        blocking=True,
+                        pcm_cache=config["pcm_cache"],
+                        normalize=config["normalize"],
+                    )
+            except Exception:
+                # A bad event or config must never take the daemon down
+                continue
+
+    def find_sound(self, theme, event):
+        """
+        Pick a sound for event. The theme's index stays in memory and is
+        rebuilt only after the theme or event folder changes.
+        """
+        from play_sound import theme_sounds
+
+        sounds = theme_sounds(self.plugin_root, theme, event, self._themes)
+        return random.choice(sounds) if sounds else None
+
+
+def serve():
+    daemon = PlaybackDaemon(socket_path())
+    if daemon.bind():
+        daemon.serve()
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "serve" and supported():
+        serve()
+    elif command == "stop" and supported():
+        try:
+            _send({"op": "stop"})
+        except OSError:
+            pass
+    else:
+        print("Usage: voice_daemon.py serve | stop")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()